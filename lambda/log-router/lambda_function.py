@@ -7,14 +7,30 @@ OpenSearch Bulk API로 개별 문서를 직접 전송합니다.
 """
 
 import base64
+import functools
 import gzip
+import hashlib
+import hmac
+import http.client
 import json
 import logging
 import os
+import queue
+import random
 import re
+import ssl
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from urllib.request import Request, urlopen
-from urllib.error import HTTPError, URLError
+from urllib.parse import parse_qsl, quote, urlsplit
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성: 설치된 경우에만 사용
+    orjson = None
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -24,62 +40,396 @@ OPENSEARCH_ENDPOINT = os.environ.get('OPENSEARCH_ENDPOINT', '')
 OPENSEARCH_REGION = os.environ.get('AWS_REGION', 'ap-northeast-2')
 INDEX_PREFIX = os.environ.get('INDEX_PREFIX', 'logs')
 
+# JSON 백엔드 (auto: orjson 설치 시 사용, json: 표준 라이브러리 강제)
+JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+
+# Bulk 재시도 설정 (429/503 throttling 응답만 재시도)
+BULK_MAX_RETRIES = int(os.environ.get('BULK_MAX_RETRIES', '3'))
+BULK_RETRY_BASE_DELAY_MS = int(os.environ.get('BULK_RETRY_BASE_DELAY_MS', '200'))
+BULK_RETRY_MAX_DELAY_MS = int(os.environ.get('BULK_RETRY_MAX_DELAY_MS', '5000'))
+BULK_REQUEST_TIMEOUT_SECONDS = 30
+
+# 마감 시각 여유 (Lambda 타임아웃 전에 결과를 반환할 시간)
+DEADLINE_SAFETY_MARGIN_MS = int(os.environ.get('DEADLINE_SAFETY_MARGIN_MS', '2000'))
+
+# Bulk 요청 분할 기준 (OpenSearch 권장 5~15MB, http.max_content_length 이하)
+BULK_MAX_BYTES = int(os.environ.get('BULK_MAX_BYTES', str(5 * 1024 * 1024)))
+BULK_MAX_DOCUMENTS = int(os.environ.get('BULK_MAX_DOCUMENTS', '1000'))
+
+# 동시 전송 청크 수 (단일 노드 클러스터이므로 작게 유지)
+BULK_CONCURRENCY = int(os.environ.get('BULK_CONCURRENCY', '2'))
+
+# 적응형 Bulk 크기/동시성 제어 (AIMD: 여유가 있으면 조금씩 늘리고, 429/지연 시 크게 줄임)
+# BULK_MAX_DOCUMENTS / BULK_CONCURRENCY는 시작값으로 사용
+BULK_ADAPTIVE = os.environ.get('BULK_ADAPTIVE', 'true').lower() == 'true'
+BULK_MIN_DOCUMENTS = int(os.environ.get('BULK_MIN_DOCUMENTS', '100'))
+BULK_DOCUMENTS_LIMIT = int(os.environ.get('BULK_DOCUMENTS_LIMIT', '5000'))
+BULK_DOCUMENTS_STEP = int(os.environ.get('BULK_DOCUMENTS_STEP', '100'))
+BULK_MAX_CONCURRENCY = int(os.environ.get('BULK_MAX_CONCURRENCY', '4'))
+BULK_TARGET_TOOK_MS = int(os.environ.get('BULK_TARGET_TOOK_MS', '1000'))
+
+# 서킷 브레이커 (연속 요청 실패 시 cooldown 동안 OpenSearch 호출 없이 스필, SPILL_TARGET이 있을 때만)
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '3'))
+CIRCUIT_COOLDOWN_SECONDS = int(os.environ.get('CIRCUIT_COOLDOWN_SECONDS', '60'))
+
+# 브레이커가 열려 있는 동안 변환된 문서(Bulk NDJSON)를 gzip으로 저장할 위치
+# file:///tmp/spill (로컬/테스트) 또는 s3://bucket/prefix, 비어 있으면 브레이커가 열려도 그대로 전송
+SPILL_TARGET = os.environ.get('SPILL_TARGET', '')
+
+# CloudWatch 지표 네임스페이스 (Embedded Metric Format 로그로 기록)
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'LogRouter')
+
+# 로그 그룹 → 서비스명 캐시 크기
+SERVICE_NAME_CACHE_SIZE = 1024
+
+# 서비스명 환경 접미사 (예: atlantis-prod → atlantis)
+ENV_SUFFIX_PATTERN = re.compile(r'-(prod|staging|dev).*$')
+
+# 스택 트레이스의 Exception/Error 클래스명 접미사 및 식별자 문자
+EXCEPTION_SUFFIX_PATTERN = re.compile(r'Exception|Error')
+IDENTIFIER_START_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_')
+IDENTIFIER_CHARS = IDENTIFIER_START_CHARS | frozenset('0123456789')
+
+# Exception 클래스 추출 시 검사할 스택 트레이스 최대 줄 수 (0: 전체)
+EXCEPTION_SCAN_MAX_LINES = int(os.environ.get('EXCEPTION_SCAN_MAX_LINES', '0'))
+
+# 텍스트 로그 레벨 토큰 (logback/log4j 패턴의 앞부분에서만 검색)
+# 예: 2025-01-15 10:23:45.123  INFO 1 --- [main] c.c.Foo : ...
+#     10:23:45.123 [http-nio-8080-exec-1] ERROR c.c.Foo - ...
+#     [WARNING] 2025-01-15T01:23:45.123Z ... (Lambda Python)
+LOG_LEVEL_PATTERN = re.compile(r'(?<![A-Za-z])(TRACE|DEBUG|INFO|NOTICE|WARN|WARNING|ERROR|FATAL|CRITICAL|SEVERE)(?![A-Za-z])')
+LOG_LEVEL_PREFIX_CHARS = int(os.environ.get('LOG_LEVEL_PREFIX_CHARS', '120'))
+
+# 레벨 표기 → 표준 레벨
+LOG_LEVEL_ALIASES = {
+    'TRACE': 'TRACE', 'FINEST': 'TRACE', 'FINER': 'TRACE',
+    'DEBUG': 'DEBUG', 'FINE': 'DEBUG',
+    'INFO': 'INFO', 'NOTICE': 'INFO',
+    'WARN': 'WARN', 'WARNING': 'WARN',
+    'ERROR': 'ERROR', 'FATAL': 'ERROR', 'CRITICAL': 'ERROR', 'SEVERE': 'ERROR',
+}
+
+# JSON 로그 필드 별칭 테이블 {표준 필드: [별칭(우선순위 순)]}
+FIELD_ALIASES = {
+    # 로그 레벨 / 로거 / 스레드
+    'log_level': ['level', 'log_level', 'severity'],
+    'logger': ['logger', 'logger_name', 'caller'],
+    'thread': ['thread', 'thread_name'],
+    # 스택 트레이스
+    'stack_trace': ['stack_trace', 'stacktrace', 'exception'],
+    # HTTP 관련 필드
+    'http_method': ['http_method', 'method', 'httpMethod'],
+    'http_path': ['http_path', 'path', 'uri', 'url'],
+    'status_code': ['status_code', 'statusCode', 'status', 'http_status'],
+    'duration_ms': ['duration', 'duration_ms', 'response_time', 'elapsed'],
+    'client_ip': ['client_ip', 'clientIp', 'remote_addr', 'ip'],
+    # 분산 추적 필드
+    'trace_id': ['trace_id', 'traceId', 'x-amzn-trace-id'],
+    'span_id': ['span_id', 'spanId'],
+    'request_id': ['request_id', 'requestId', 'correlationId'],
+    # 비즈니스 컨텍스트
+    'user_id': ['user_id', 'userId'],
+    'action': ['action', 'operation'],
+    'app_name': ['APP_NAME', 'application', 'service', 'SERVICE_NAME'],
+    'environment': ['APP_ENV', 'environment', 'env', 'ENVIRONMENT'],
+}
+
+# JSON 평탄화 한도 (초과분은 OVERFLOW_FIELD 하나에 직렬화 문자열로 보관 - 매핑 폭증 방지)
+FLATTEN_MAX_DEPTH = int(os.environ.get('FLATTEN_MAX_DEPTH', '8'))
+FLATTEN_MAX_FIELDS = int(os.environ.get('FLATTEN_MAX_FIELDS', '200'))
+OVERFLOW_FIELD = 'overflow'
+
+# 텍스트 로그 포맷 캐시 크기 (로그 그룹별 감지 결과)
+TEXT_FORMAT_CACHE_SIZE = int(os.environ.get('TEXT_FORMAT_CACHE_SIZE', '1024'))
+
+# 서비스별 추가 별칭 (JSON: {"<service>": {"<표준 필드>": ["별칭", ...]}})
+FIELD_ALIAS_OVERRIDES = os.environ.get('FIELD_ALIAS_OVERRIDES', '')
+
+# 샘플링 비율 (JSON: {"default": {"DEBUG": 0.1}, "<service>": {"INFO": 0.2} 또는 0.5})
+# 서비스/레벨별 보존 비율이며, 지정되지 않은 조합은 모두 보존. ALWAYS_KEEP_LEVELS는 항상 보존
+SAMPLING_RATES = os.environ.get('SAMPLING_RATES', '')
+ALWAYS_KEEP_LEVELS = frozenset({'WARN', 'ERROR'})
+
+# 서비스별 수집 한도 (JSON: {"default": {"rate": 500, "burst": 5000}, "<service>": {"rate": 100}})
+# rate는 초당 문서 수, burst는 버킷 크기(기본값: rate의 10배). 지정되지 않은 서비스는 제한 없음
+# 버킷은 Lambda 실행 환경(인스턴스)마다 따로 유지되므로 한도도 인스턴스당 값입니다.
+# 스트림이 ON_DEMAND(샤드 수 가변)이고 parallelization_factor = 2이므로 서비스 전체 수집량은
+# rate × (해당 서비스 로그를 처리 중인 인스턴스 수)까지 늘어날 수 있으며, 값은 이를 감안해 정합니다.
+INGEST_QUOTAS = os.environ.get('INGEST_QUOTAS', '')
+
+# 한도 소진 시 레벨별 차단 기준 (버킷 잔량이 burst * 비율 이하로 내려가면 해당 레벨부터 차단)
+QUOTA_SHED_FLOORS = {'TRACE': 0.5, 'DEBUG': 0.5, 'INFO': 0.25, 'WARN': 0.1, 'ERROR': 0.0}
+
+# 레코드 내 중복 로그 라인 합치기 (선택, 숫자만 다른 메시지는 같은 메시지로 취급)
+DEDUP_ENABLED = os.environ.get('DEDUP_ENABLED', 'false').lower() == 'true'
+DEDUP_NUMBER_PATTERN = re.compile(r'\d+')
+# 요청 단위 필드 - 이 필드가 있는 라인은 메시지가 같아도 서로 다른 요청이므로 합치지 않음
+DEDUP_REQUEST_FIELDS = ('trace_id', 'request_id', 'status_code')
+
+# 서비스/레벨/예외 클래스별 분 단위 집계 문서 (rollup-logs-YYYY-MM-DD, 스크립트 upsert로 누적)
+# 로그 라인으로 집계되지 않도록 {INDEX_PREFIX}-* 패턴 밖의 인덱스를 사용 (별도 템플릿/ISM 정책)
+ROLLUP_ENABLED = os.environ.get('ROLLUP_ENABLED', 'true').lower() == 'true'
+ROLLUP_INDEX_PREFIX = os.environ.get('ROLLUP_INDEX_PREFIX', f'rollup-{INDEX_PREFIX}')
+ROLLUP_SCRIPT = {"source": "ctx._source.count += params.count", "lang": "painless"}
+
+# 재시도 가능한 상태 코드 (es_rejected_execution_exception, 일시적 과부하)
+RETRYABLE_STATUS_CODES = {429, 503}
+
 # 인덱스 설정 - 단일 노드 클러스터 최적화
+# log_timestamp는 텍스트 포맷마다 형식이 달라(ISO+offset, 시각만, nginx 형식) 날짜로 자동 감지되면
+# 다른 형식의 라인이 매핑 오류(400)로 유실되므로 원문 keyword로 고정 (시각 기준은 @timestamp)
 INDEX_SETTINGS = {
     "settings": {
         "number_of_shards": 1,
         "number_of_replicas": 0
+    },
+    "mappings": {
+        "properties": {
+            "log_timestamp": {"type": "keyword"}
+        }
     }
 }
 
-# 이미 확인된 인덱스 캐시 (Lambda 실행 컨텍스트 내 재사용)
-_existing_indices = set()
+# 인덱스 템플릿 - 새 인덱스는 Bulk 자동 생성 시 INDEX_SETTINGS가 적용됨
+# (terraform의 logs-template과 같은 이름을 사용하여, 이미 있으면 덮어쓰지 않음)
+INDEX_TEMPLATE_NAME = os.environ.get('INDEX_TEMPLATE_NAME', f'{INDEX_PREFIX}-template')
+INDEX_TEMPLATE_PRIORITY = 100
+
+# 확인된 인덱스 캐시 크기/유효 시간 (ISM 삭제 등으로 사라진 인덱스를 다시 확인하도록 만료)
+# 인덱스 템플릿 확인에 실패한 경우에도 이 시간이 지나면 다시 확인
+INDEX_CACHE_MAX_SIZE = int(os.environ.get('INDEX_CACHE_MAX_SIZE', '64'))
+INDEX_CACHE_TTL_SECONDS = int(os.environ.get('INDEX_CACHE_TTL_SECONDS', '3600'))
+
+# 이미 확인된 인덱스 캐시 (Lambda 실행 컨텍스트 내 재사용, get_existing_indices()로 생성)
+_existing_indices = None
+
+# 인덱스 템플릿 확인 결과 (None: 미확인, True: 등록됨, False: 실패 → 인덱스 직접 확인으로 대체)
+_index_template_ready = None
+_index_template_checked_at = 0.0
+
+# Keep-alive 커넥션 풀 및 Bulk 전송 스레드 풀 (Lambda 실행 컨텍스트 내 재사용)
+_connection_pool = None
+_bulk_executor = None
+
+# 적응형 Bulk 제어 상태 (웜 인보케이션 간 유지, get_bulk_controller()로 생성)
+_bulk_controller = None
+
+# 서킷 브레이커 및 스필 저장소 (웜 인보케이션 간 유지)
+_circuit_breaker = None
+_spill_sink = None
+
+# SigV4 credentials 및 일 단위 signing key 캐시 (Lambda 실행 컨텍스트 내 재사용)
+_sigv4_credentials = None
+_signing_key_cache = {}     # {(region, service): (date_stamp, signing_key)}
+
+# 서비스별 토큰 버킷과 분 단위 차단 집계 {(service, minute): {level: count}} (웜 인보케이션 간 유지)
+_token_buckets = {}
+_quota_drops = {}
+
+# 로그 그룹별 텍스트 포맷 후보 순서 {log_group: [포맷 이름, ...]} - 최근 매칭된 포맷이 맨 앞
+_text_format_cache = {}
+
+
+# ============================================================================
+# JSON 백엔드
+# ============================================================================
+#
+# 디코딩(레코드 페이로드, JSON 로그 메시지)과 인코딩(Bulk 문서)은 핫 패스이므로
+# orjson이 설치되어 있으면 사용하고, 없으면 표준 라이브러리로 동작합니다.
+# 두 백엔드 모두 compact UTF-8 형식으로 직렬화하여 문자열/정수/중첩 구조는
+# 바이트 단위로 동일한 결과를 냅니다.
+# ============================================================================
+
+def _stdlib_json_loads(data):
+    return json.loads(data)
+
+
+def _stdlib_json_dumps(obj) -> bytes:
+    try:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    except UnicodeEncodeError:
+        # 짝이 없는 surrogate 문자 등 UTF-8로 인코딩할 수 없는 문자열은 ASCII escape
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def _orjson_loads(data):
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # NaN, 64비트를 넘는 정수 등 orjson이 거부하는 입력은 표준 라이브러리로 재시도
+        return json.loads(data)
+
+
+def _orjson_dumps(obj) -> bytes:
+    try:
+        return orjson.dumps(obj)
+    except TypeError:
+        # 문자열이 아닌 키, 64비트를 넘는 정수, surrogate 문자 등
+        return _stdlib_json_dumps(obj)
+
+
+def use_json_backend(name: str) -> str:
+    """
+    JSON 백엔드를 선택하고 실제 적용된 백엔드 이름을 반환합니다.
+
+    Args:
+        name: 'auto' | 'orjson' | 'json'
+    """
+    global json_loads, json_dumps
+
+    if name in ('auto', 'orjson') and orjson is not None:
+        json_loads, json_dumps = _orjson_loads, _orjson_dumps
+        return 'orjson'
+
+    if name == 'orjson':
+        logger.warning("orjson is not installed, falling back to json")
+    json_loads, json_dumps = _stdlib_json_loads, _stdlib_json_dumps
+    return 'json'
+
+
+json_loads = _stdlib_json_loads
+json_dumps = _stdlib_json_dumps
+use_json_backend(JSON_BACKEND)
 
 
 def handler(event, context):
     """
     Kinesis Data Streams에서 레코드를 받아서 OpenSearch로 전송합니다.
 
+    레코드 디코딩 → 압축 해제 → 이벤트 변환 → NDJSON 직렬화 → 청크 전송이
+    제너레이터 파이프라인으로 이어져, 배치 전체가 아닌 청크 크기만큼만
+    메모리에 유지됩니다.
+
+    Event Source Mapping의 ReportBatchItemFailures 설정과 함께 동작하며,
+    Bulk 응답에서 실패한 문서를 원본 Kinesis 레코드로 역매핑하여
+    해당 레코드의 sequenceNumber만 batchItemFailures로 반환합니다.
+    Lambda는 가장 작은 실패 sequenceNumber부터 재시도하므로
+    성공한 앞쪽 레코드는 재인덱싱되지 않습니다.
+
+    남은 실행 시간 안에 처리/전송을 마칠 수 없는 레코드는 처리하지 않고
+    batchItemFailures로 반환하여 Lambda 타임아웃으로 배치 전체가 재시도되지 않게 합니다.
+
     Args:
         event: Kinesis 이벤트 (Records 배열 포함)
         context: Lambda 컨텍스트
 
     Returns:
-        처리 결과 요약
+        처리 결과 요약 + batchItemFailures
     """
-    documents = []
     failed_records = []
+    sampling_stats = {}
+    record_rollups = {}
+    writer = BulkWriter(deadline=get_deadline(context))
+    scheduler = writer.scheduler
+
+    records = event.get('Records', [])
+    for sequence_number, index_name, doc in iter_log_documents(records, failed_records, scheduler):
+        # 집계는 샘플링/수집 한도 적용 전 전체 이벤트 기준
+        if ROLLUP_ENABLED:
+            count_rollup(doc, record_rollups.setdefault(sequence_number, {}))
+        if _sampling_thresholds and not sample_document(doc, sampling_stats):
+            continue
+        if _ingest_quotas and not admit_document(doc):
+            continue
+        writer.add(index_name, doc, sequence_number)
+
+    # 지난 분의 한도 초과 집계를 서비스별 요약 문서로 기록
+    for index_name, summary_doc in iter_quota_summaries():
+        writer.add(index_name, summary_doc)
+
+    success_count, error_count, failed_sources = writer.close()
+
+    # source_id가 없는 문서(요약/집계 등)는 Kinesis 레코드와 무관하므로 정렬 전에 제외
+    failed_sequence_numbers = {
+        sequence_number
+        for sequence_number in failed_sources | scheduler.skipped_sources
+        if sequence_number
+    }
 
-    for record in event.get('Records', []):
-        try:
-            # Kinesis 데이터 디코딩
-            kinesis_data = record['kinesis']['data']
-            payload = base64.b64decode(kinesis_data)
+    # 분 단위 집계 문서 upsert - 로그 문서 전송 후 남은 시간에 별도 writer로 전송하여
+    # 로그 문서 건수와 섞이지 않게 함 (source_id가 없어 실패해도 레코드 재처리 대상은 아님)
+    # 재처리될 레코드의 집계는 재처리 시 다시 집계되므로 제외
+    rollup_writer = BulkWriter(deadline=writer.deadline, scheduler=scheduler)
+    for index_name, entry in iter_rollup_entries(select_rollups(record_rollups, failed_sequence_numbers)):
+        rollup_writer.add_entry(index_name, entry)
+    rollups_upserted, _, _ = rollup_writer.close()
+    if writer.document_count:
+        logger.info(f"Indexed {success_count} documents, {error_count} errors")
+    if sampling_stats:
+        logger.info(f"Sampling kept/dropped by service: {sampling_stats}")
+    if writer.controller is not None:
+        emit_metrics(writer.controller.export_metrics())
 
-            # CloudWatch Logs 데이터는 gzip으로 압축되어 있음
-            try:
-                decompressed = gzip.decompress(payload)
-                log_data = json.loads(decompressed)
-            except gzip.BadGzipFile:
-                log_data = json.loads(payload)
+    result = {
+        'processedRecords': len(event.get('Records', [])),
+        'documentsIndexed': success_count,
+        'documentErrors': error_count,
+        'failedRecords': len(failed_records),
+        'documentsSampledOut': sum(stats['dropped'] for stats in sampling_stats.values()),
+        'deferredRecords': len(scheduler.skipped_sources),
+        'documentsSpilled': writer.spilled_count,
+        'rollupsUpserted': rollups_upserted,
+        'batchItemFailures': [
+            {'itemIdentifier': sequence_number}
+            for sequence_number in sorted(failed_sequence_numbers, key=int)
+        ]
+    }
+
+    logger.info(f"Processing complete: {result}")
+    return result
+
+
+def decode_record(record: dict) -> dict:
+    """
+    Kinesis 레코드를 CloudWatch Logs 페이로드로 디코딩합니다.
+    CloudWatch Logs 데이터는 gzip으로 압축되어 있습니다.
+    """
+    payload = base64.b64decode(record['kinesis']['data'])
+
+    try:
+        return json_loads(gzip.decompress(payload))
+    except gzip.BadGzipFile:
+        return json_loads(payload)
+
+
+def iter_log_documents(records: list, failed_records: list, scheduler=None):
+    """
+    Kinesis 레코드를 순회하며 OpenSearch 문서를 하나씩 생성합니다.
+
+    디코딩/파싱 실패는 재시도해도 동일하게 실패하므로 failed_records에 기록하고
+    재처리 대상에서 제외합니다.
+
+    scheduler(DeadlineScheduler)가 주어지면 레코드마다 남은 시간을 확인하여,
+    처리와 전송을 마감 전에 끝낼 수 없는 나머지 레코드를 scheduler.skipped_sources에
+    기록하고 중단합니다.
+
+    Yields:
+        (sequence_number, index_name, document)
+    """
+    for position, record in enumerate(records):
+        sequence_number = record.get('kinesis', {}).get('sequenceNumber')
+
+        if scheduler is not None:
+            if not scheduler.has_time_for_record():
+                deferred = [r.get('kinesis', {}).get('sequenceNumber') for r in records[position:]]
+                scheduler.skipped_sources.update(deferred)
+                logger.warning(f"Deadline approaching, deferring {len(deferred)} records to Kinesis retry")
+                return
+            record_started_at = time.monotonic()
+
+        try:
+            log_data = decode_record(record)
 
             # CONTROL_MESSAGE 건너뛰기
             if log_data.get('messageType') == 'CONTROL_MESSAGE':
                 continue
 
-            # 서비스명 및 인덱스 결정
-            log_group = log_data.get('logGroup', 'unknown')
-            service_name = extract_service_name(log_group)
-            index_date = datetime.utcnow().strftime('%Y-%m-%d')
-            index_name = f"{INDEX_PREFIX}-{service_name}-{index_date}"
+            documents = iter_record_documents(log_data)
+            if DEDUP_ENABLED:
+                documents = collapse_duplicates(documents)
 
-            # 각 로그 이벤트를 개별 문서로 변환
-            for log_event in log_data.get('logEvents', []):
-                doc = transform_log_event(log_event, log_data)
-                documents.append({
-                    'index': index_name,
-                    'document': doc
-                })
+            for index_name, doc in documents:
+                yield sequence_number, index_name, doc
 
         except Exception as e:
             logger.error(f"Error processing record: {e}")
@@ -88,31 +438,402 @@ def handler(event, context):
                 'error': str(e)
             })
 
-    # OpenSearch Bulk API로 전송
-    if documents:
-        success_count, error_count = bulk_index_to_opensearch(documents)
-        logger.info(f"Indexed {success_count} documents, {error_count} errors")
-    else:
-        success_count, error_count = 0, 0
+        if scheduler is not None:
+            scheduler.observe_record(time.monotonic() - record_started_at)
 
-    result = {
-        'processedRecords': len(event.get('Records', [])),
-        'documentsIndexed': success_count,
-        'documentErrors': error_count,
-        'failedRecords': len(failed_records)
-    }
 
-    logger.info(f"Processing complete: {result}")
-    return result
+def iter_record_documents(log_data: dict):
+    """
+    디코딩된 레코드 하나의 로그 이벤트를 문서로 변환합니다.
+
+    Yields:
+        (index_name, document) - 인덱스는 이벤트 시각 기준 일자
+    """
+    # 레코드 단위 공통 값은 한 번만 계산
+    record_context = build_record_context(log_data)
+    index_prefix = f"{INDEX_PREFIX}-{record_context['service']}-"
+    index_names = {}  # 이벤트 날짜(UTC 일 번호) → 인덱스 이름
+
+    for log_event in log_data.get('logEvents', []):
+        day = get_event_day(log_event.get('timestamp'))
+        index_name = index_names.get(day)
+        if index_name is None:
+            index_name = index_names[day] = index_prefix + format_index_date(day)
+        yield index_name, transform_log_event(log_event, record_context)
 
 
-def transform_log_event(log_event: dict, log_data: dict) -> dict:
+def collapse_duplicates(documents):
+    """
+    레코드 안에서 반복되는 로그 라인을 첫 문서 하나로 합칩니다.
+
+    같은 레코드의 이벤트는 서비스/로그 스트림이 같으므로, (인덱스, 레벨, 정규화된 원본 라인)을
+    키로 사용합니다. 원본 라인은 숫자를 DEDUP_NUMBER_PATTERN으로 치환해 정규화하며,
+    반복된 문서에는 repeat_count, first_seen, last_seen을 추가합니다.
+
+    JSON 로그도 정규화된 원본 라인 전체를 키로 사용하므로, 숫자 외 필드 값이 하나라도 다르면
+    합쳐지지 않습니다. 요청 단위 필드(DEDUP_REQUEST_FIELDS)가 있는 라인은 trace_id/상태 코드 등을
+    잃지 않도록 합치지 않습니다.
+
+    Args:
+        documents: iter_record_documents()의 (index_name, document)
+
+    Returns:
+        합쳐진 (index_name, document) 목록 (첫 등장 순서 유지)
+    """
+    collapsed = {}
+    for position, (index_name, doc) in enumerate(documents):
+        message = doc['raw_message']
+        if any(field in doc for field in DEDUP_REQUEST_FIELDS):
+            collapsed[position] = (index_name, doc)
+            continue
+        key = (index_name, doc['level'], DEDUP_NUMBER_PATTERN.sub('0', message))
+
+        first = collapsed.get(key)
+        if first is None:
+            collapsed[key] = (index_name, doc)
+            continue
+
+        first_doc = first[1]
+        if 'repeat_count' not in first_doc:
+            first_doc['repeat_count'] = 1
+            first_doc['first_seen'] = first_doc['@timestamp']
+        first_doc['repeat_count'] += 1
+        first_doc['last_seen'] = doc['@timestamp']
+
+    return list(collapsed.values())
+
+
+def get_event_day(timestamp_ms) -> int:
+    """
+    이벤트 타임스탬프(밀리초)의 UTC 일 번호를 반환합니다.
+    타임스탬프가 없으면 현재 시각을 사용합니다.
+    """
+    if not timestamp_ms:
+        timestamp_ms = time.time() * 1000
+    return int(timestamp_ms // 86400000)
+
+
+@functools.lru_cache(maxsize=32)
+def format_index_date(day: int) -> str:
+    """UTC 일 번호를 인덱스 날짜 접미사(YYYY-MM-DD)로 변환합니다."""
+    return datetime.utcfromtimestamp(day * 86400).strftime('%Y-%m-%d')
+
+
+def sample_document(doc: dict, stats: dict) -> bool:
+    """
+    서비스/레벨별 샘플링 비율에 따라 문서를 보존할지 결정합니다.
+
+    ALWAYS_KEEP_LEVELS(WARN/ERROR)는 항상 보존합니다. 그 외 레벨은 trace_id의
+    CRC32 해시를 비율 임계값과 비교하므로, 같은 요청의 로그 라인은 서비스와
+    인보케이션에 관계없이 함께 보존되거나 함께 제외됩니다.
+    (trace_id가 없으면 event_id 기준 - 재처리 시에도 같은 결정)
+
+    Args:
+        doc: transform_log_event()로 만든 문서
+        stats: 서비스별 {'kept': n, 'dropped': n} 집계 (갱신됨)
+
+    Returns:
+        보존 여부
+    """
+    service = doc['service']
+    service_stats = stats.get(service)
+    if service_stats is None:
+        service_stats = stats[service] = {'kept': 0, 'dropped': 0}
+
+    level = doc['level']
+    if level not in ALWAYS_KEEP_LEVELS:
+        # 서비스 설정이 있으면 default 대신 사용 (모든 레벨을 보존하는 빈 설정 포함)
+        thresholds = _sampling_thresholds[service] if service in _sampling_thresholds else _sampling_thresholds.get('default')
+        threshold = thresholds.get(level) if thresholds else None
+        if threshold is not None:
+            sampling_key = doc.get('trace_id') or doc['event_id']
+            if zlib.crc32(str(sampling_key).encode('utf-8')) >= threshold:
+                service_stats['dropped'] += 1
+                return False
+
+    service_stats['kept'] += 1
+    return True
+
+
+def count_rollup(doc: dict, rollups: dict):
+    """
+    (서비스, 레벨, 예외 클래스, 분) 단위로 이벤트 수를 집계합니다.
+    중복 제거(collapse_duplicates)로 합쳐진 문서는 repeat_count만큼 집계합니다.
+    """
+    # @timestamp는 'YYYY-MM-DDTHH:MM:SS...Z' 형식이므로 앞 16자가 분 단위 키
+    key = (doc['service'], doc['level'], doc.get('exception_class') or '', doc['@timestamp'][:16])
+    rollups[key] = rollups.get(key, 0) + doc.get('repeat_count', 1)
+
+
+def select_rollups(record_rollups: dict, failed_sequence_numbers: set) -> dict:
+    """
+    레코드별 집계 중 이번 호출에서 확정된 레코드의 집계만 합칩니다.
+
+    Lambda는 batchItemFailures의 가장 작은 sequenceNumber부터 이후 레코드를 모두
+    재처리하므로, 그 레코드들의 집계를 지금 upsert하면 재처리 시 count가 중복 누적됩니다.
+
+    Args:
+        record_rollups: {sequence_number: {집계 키: count}}
+        failed_sequence_numbers: 재처리 대상(실패/연기) sequenceNumber 집합
+
+    Returns:
+        {집계 키: count}
+    """
+    cutoff = min(map(int, failed_sequence_numbers)) if failed_sequence_numbers else None
+
+    rollups = {}
+    for sequence_number, counts in record_rollups.items():
+        if cutoff is not None and sequence_number and int(sequence_number) >= cutoff:
+            continue
+        for key, count in counts.items():
+            rollups[key] = rollups.get(key, 0) + count
+    return rollups
+
+
+def iter_rollup_entries(rollups: dict):
+    """
+    집계를 rollup-logs-* 인덱스의 스크립트 upsert Bulk 항목으로 변환합니다.
+
+    여러 Lambda 인스턴스가 같은 분을 집계하므로 _id를 (서비스, 레벨, 예외 클래스, 분)으로
+    고정하고 count를 스크립트로 누적합니다. 동시 갱신 충돌은 retry_on_conflict로 처리합니다.
+
+    Yields:
+        (index_name, entry_bytes) - action line + 본문 NDJSON
+    """
+    for (service, level, exception_class, minute), count in sorted(rollups.items()):
+        index_name = f"{ROLLUP_INDEX_PREFIX}-{minute[:10]}"
+        doc_id = hashlib.sha1(f"{service}|{level}|{exception_class}|{minute}".encode('utf-8')).hexdigest()
+
+        upsert = {
+            '@timestamp': f"{minute}:00Z",
+            'service': service,
+            'level': level,
+            'count': count,
+        }
+        if exception_class:
+            upsert['exception_class'] = exception_class
+
+        action_line = json_dumps({"update": {"_index": index_name, "_id": doc_id, "retry_on_conflict": 3}})
+        body_line = json_dumps({"script": {**ROLLUP_SCRIPT, "params": {"count": count}}, "upsert": upsert})
+        yield index_name, action_line + b'\n' + body_line + b'\n'
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 burst개까지 쌓이는 토큰 버킷입니다."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def consume(self, floor: float = 0.0) -> bool:
+        """잔량이 floor 토큰보다 많이 남는 경우에만 토큰 하나를 사용합니다."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+        if self.tokens - 1 < floor:
+            return False
+        self.tokens -= 1
+        return True
+
+
+def admit_document(doc: dict) -> bool:
+    """
+    서비스별 토큰 버킷으로 문서 수집 여부를 결정합니다 (버킷은 인스턴스마다 따로 유지, 한도도 인스턴스당).
+
+    버킷 잔량이 줄어들수록 QUOTA_SHED_FLOORS가 높은 레벨(TRACE/DEBUG → INFO → WARN)부터
+    차단하여, 한도를 넘긴 서비스에서도 ERROR는 마지막까지 수집합니다.
+    차단된 문서 수는 (서비스, 분) 단위로 집계하여 iter_quota_summaries()가 기록합니다.
+
+    Returns:
+        수집 여부
+    """
+    service = doc['service']
+    bucket = _token_buckets.get(service)
+    if bucket is None:
+        quota = _ingest_quotas.get(service) or _ingest_quotas.get('default')
+        if quota is None:
+            return True
+        bucket = _token_buckets[service] = TokenBucket(*quota)
+
+    level = doc['level']
+    if bucket.consume(QUOTA_SHED_FLOORS.get(level, 0.0) * bucket.burst):
+        return True
+
+    key = (service, int(time.time() // 60))
+    level_drops = _quota_drops.get(key)
+    if level_drops is None:
+        level_drops = _quota_drops[key] = {}
+    level_drops[level] = level_drops.get(level, 0) + 1
+    return False
+
+
+def iter_quota_summaries(current_minute: int = None):
+    """
+    지난 분의 한도 초과 집계를 서비스별 요약 문서로 반환하고 집계에서 제거합니다.
+    진행 중인 분은 다음 인보케이션에서 기록하므로 서비스/분당 요약 문서는 하나입니다.
+
+    Yields:
+        (index_name, summary_doc)
+    """
+    if current_minute is None:
+        current_minute = int(time.time() // 60)
+
+    for service, minute in sorted(key for key in _quota_drops if key[1] < current_minute):
+        level_drops = _quota_drops.pop((service, minute))
+        dropped_count = sum(level_drops.values())
+        logger.warning(f"Ingest quota exceeded for {service}: dropped {dropped_count} documents {level_drops}")
+
+        timestamp = datetime.utcfromtimestamp(minute * 60)
+        yield f"{INDEX_PREFIX}-{service}-{timestamp.strftime('%Y-%m-%d')}", {
+            '@timestamp': timestamp.isoformat() + 'Z',
+            'service': service,
+            'level': 'WARN',
+            'event_type': 'ingest_quota_exceeded',
+            'raw_message': f"Ingest quota exceeded: dropped {dropped_count} documents",
+            'dropped_count': dropped_count,
+            'dropped_by_level': level_drops,
+        }
+
+
+def _load_ingest_quotas(quotas_json: str) -> dict:
+    """수집 한도 설정을 {service: (rate, burst)}로 변환합니다."""
+    if not quotas_json:
+        return {}
+
+    try:
+        quotas = json.loads(quotas_json)
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid INGEST_QUOTAS, quotas disabled: {e}")
+        return {}
+
+    parsed = {}
+    for service, quota in quotas.items():
+        rate = quota.get('rate') if isinstance(quota, dict) else None
+        if not isinstance(rate, (int, float)) or rate <= 0:
+            logger.error(f"Invalid INGEST_QUOTAS entry for {service}, skipping")
+            continue
+        parsed[service] = (float(rate), float(quota.get('burst') or rate * 10))
+    return parsed
+
+
+def _load_sampling_rates(rates_json: str) -> dict:
+    """
+    샘플링 비율 설정을 {service: {level: CRC32 임계값}}으로 변환합니다.
+    비율이 1 이상인 레벨은 샘플링하지 않으므로 제외합니다. 서비스 설정은 default를
+    대체하므로, 모든 레벨이 제외되어도 빈 설정으로 남아 해당 서비스는 전부 보존됩니다.
+
+    서비스 값이 숫자이면 ALWAYS_KEEP_LEVELS를 제외한 모든 레벨에 같은 비율을 적용합니다.
+    """
+    if not rates_json:
+        return {}
+
+    try:
+        rates = json.loads(rates_json)
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid SAMPLING_RATES, sampling disabled: {e}")
+        return {}
+
+    thresholds = {}
+    for service, level_rates in rates.items():
+        if isinstance(level_rates, (int, float)):
+            level_rates = {level: level_rates for level in ('TRACE', 'DEBUG', 'INFO')}
+        if not isinstance(level_rates, dict):
+            logger.error(f"Invalid SAMPLING_RATES entry for {service}, skipping")
+            continue
+        thresholds[service] = {
+            LOG_LEVEL_ALIASES.get(level.upper(), level.upper()): int(max(rate, 0) * 2 ** 32)
+            for level, rate in level_rates.items()
+            if isinstance(rate, (int, float)) and rate < 1
+        }
+    return thresholds
+
+
+def get_deadline(context) -> float | None:
+    """
+    Lambda 남은 실행 시간을 time.monotonic() 기준 마감 시각으로 변환합니다.
+    로컬 실행 등 context가 없으면 None(제한 없음)을 반환합니다.
+    """
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return None
+    return time.monotonic() + context.get_remaining_time_in_millis() / 1000
+
+
+class DeadlineScheduler:
+    """
+    Lambda 마감 시각 안에서 레코드 처리와 Bulk 전송 시간을 배분합니다.
+
+    레코드당 처리 시간(디코딩~직렬화, 전송 대기 포함)과 Bulk 요청 시간을
+    지수 이동 평균으로 추정하여,
+    - 다음 레코드를 처리한 뒤에도 남은 청크를 전송할 시간이 있는지 판단하고
+    - Bulk 요청 타임아웃과 재시도 여부를 남은 시간에 맞춥니다.
+    deadline이 None이면 제한 없이 동작합니다.
+    """
+
+    SMOOTHING = 0.3
+
+    def __init__(self, deadline: float | None):
+        self.deadline = deadline
+        self.record_seconds = 0.0
+        self.bulk_seconds = 1.0
+        self.skipped_sources = set()
+
+    def remaining(self) -> float:
+        """마감 여유를 뺀 남은 시간(초)을 반환합니다."""
+        if self.deadline is None:
+            return float('inf')
+        return self.deadline - DEADLINE_SAFETY_MARGIN_MS / 1000 - time.monotonic()
+
+    def observe_record(self, elapsed: float):
+        self.record_seconds += self.SMOOTHING * (elapsed - self.record_seconds)
+
+    def observe_bulk(self, elapsed: float):
+        self.bulk_seconds += self.SMOOTHING * (elapsed - self.bulk_seconds)
+
+    def has_time_for_record(self) -> bool:
+        """레코드 하나를 더 처리하고 전송 중/남은 청크를 마무리할 시간이 있는지 확인합니다."""
+        return self.remaining() > self.record_seconds + 2 * self.bulk_seconds
+
+    def has_time_for_bulk(self, delay: float = 0.0) -> bool:
+        """delay 후 Bulk 요청 하나를 보낼 시간이 있는지 확인합니다."""
+        return self.remaining() > delay + self.bulk_seconds
+
+    def request_timeout(self) -> float:
+        """남은 시간을 넘지 않는 Bulk 요청 타임아웃을 반환합니다."""
+        return max(1.0, min(BULK_REQUEST_TIMEOUT_SECONDS, self.remaining()))
+
+
+def build_record_context(log_data: dict) -> dict:
+    """
+    CloudWatch Logs 레코드 메타데이터에서 이벤트 공통 값을 한 번만 추출합니다.
+    같은 레코드의 모든 로그 이벤트는 logGroup/logStream/owner를 공유합니다.
+
+    Args:
+        log_data: CloudWatch Logs 메타데이터
+
+    Returns:
+        {'log_group', 'log_stream', 'service', 'aws_account', 'text_formats'}
+    """
+    log_group = log_data.get('logGroup', 'unknown')
+
+    return {
+        'log_group': log_group,
+        'log_stream': log_data.get('logStream', 'unknown'),
+        'service': extract_service_name(log_group),
+        'aws_account': log_data.get('owner', 'unknown'),
+        'text_formats': get_text_formats(log_group),
+    }
+
+
+def transform_log_event(log_event: dict, record_context: dict) -> dict:
     """
     개별 로그 이벤트를 OpenSearch 문서 형식으로 변환합니다.
 
     Args:
         log_event: CloudWatch 로그 이벤트
-        log_data: CloudWatch Logs 메타데이터
+        record_context: build_record_context()로 만든 레코드 공통 값
 
     Returns:
         OpenSearch 문서
@@ -123,30 +844,35 @@ def transform_log_event(log_event: dict, log_data: dict) -> dict:
 
     # 메시지 파싱 시도
     message = log_event.get('message', '')
-    parsed_fields = parse_log_message(message)
+    parsed_fields = parse_log_message(message, record_context['service'], record_context['text_formats'])
+
+    level = extract_log_level(message, parsed_fields)
 
     # 기본 문서 구조
     doc = {
         '@timestamp': timestamp,
-        'log_group': log_data.get('logGroup', 'unknown'),
-        'log_stream': log_data.get('logStream', 'unknown'),
-        'service': extract_service_name(log_data.get('logGroup', '')),
-        'aws_account': log_data.get('owner', 'unknown'),
+        'log_group': record_context['log_group'],
+        'log_stream': record_context['log_stream'],
+        'service': record_context['service'],
+        'aws_account': record_context['aws_account'],
         'raw_message': message,  # 원본 메시지는 raw_message로 저장
         'event_id': log_event.get('id', ''),
-        'level': extract_log_level(message),
+        'level': level,
     }
 
-    # 파싱된 필드 추가
+    # 파싱된 필드 추가 (JSON의 원본 level 값은 정규화된 레벨로 유지)
     if parsed_fields:
         doc.update(parsed_fields)
+        doc['level'] = level
 
     return doc
 
 
+@functools.lru_cache(maxsize=SERVICE_NAME_CACHE_SIZE)
 def extract_service_name(log_group: str) -> str:
     """
     로그 그룹 이름에서 서비스 이름을 추출합니다.
+    로그 그룹 수는 제한적이므로 결과를 LRU 캐시에 보관합니다.
 
     예: /aws/ecs/atlantis-prod/application → atlantis
         /aws/ecs/gateway-prod/application → gateway
@@ -160,7 +886,7 @@ def extract_service_name(log_group: str) -> str:
         if parts[1] in ['ecs', 'lambda']:
             service_part = parts[2]
             # 서비스명에서 환경 접미사 제거 (예: atlantis-prod → atlantis)
-            service_name = re.sub(r'-(prod|staging|dev).*$', '', service_part)
+            service_name = ENV_SUFFIX_PATTERN.sub('', service_part)
             # 복합 서비스명 처리 (예: crawlinghub-web-api → crawlinghub)
             if '-' in service_name:
                 service_name = service_name.split('-')[0]
@@ -170,313 +896,1337 @@ def extract_service_name(log_group: str) -> str:
     return parts[-1] if parts else 'unknown'
 
 
-def extract_log_level(message: str) -> str:
+def extract_log_level(message: str, parsed_fields: dict = None) -> str:
     """
     로그 메시지에서 로그 레벨을 추출합니다.
+
+    JSON 로그는 구조화된 level/log_level/severity 필드를 사용하고,
+    텍스트 로그는 logback/log4j 패턴의 앞부분(LOG_LEVEL_PREFIX_CHARS)에서
+    대문자 레벨 토큰만 찾습니다. 메시지 전체를 대문자로 복사하거나
+    본문 중간의 'error' 같은 단어로 레벨을 판단하지 않습니다.
+
+    Args:
+        message: 원본 로그 메시지
+        parsed_fields: parse_log_message() 결과 (JSON 로그인 경우)
+
+    Returns:
+        TRACE | DEBUG | INFO | WARN | ERROR
     """
-    message_upper = message.upper()
+    if parsed_fields:
+        structured_level = parsed_fields.get('log_level')
+        return LOG_LEVEL_ALIASES.get(structured_level, 'INFO') if structured_level else 'INFO'
+
+    match = LOG_LEVEL_PATTERN.search(message, 0, LOG_LEVEL_PREFIX_CHARS)
+    if match:
+        return LOG_LEVEL_ALIASES[match.group(1)]
 
-    if 'ERROR' in message_upper or 'FATAL' in message_upper:
-        return 'ERROR'
-    elif 'WARN' in message_upper:
-        return 'WARN'
-    elif 'DEBUG' in message_upper:
-        return 'DEBUG'
-    elif 'TRACE' in message_upper:
-        return 'TRACE'
-    else:
-        return 'INFO'
+    return 'INFO'
 
 
-def parse_log_message(message: str) -> dict:
+def parse_log_message(message: str, service: str = None, text_formats: list = None) -> dict:
     """
     로그 메시지를 파싱하여 모든 JSON 필드를 최상위로 평탄화합니다.
     JSON 형식인 경우 전체 필드를 추출하고, 추가 정규화를 수행합니다.
+    JSON이 아닌 경우 text_formats 순서로 텍스트 포맷 패턴을 적용합니다.
+
+    필드 정규화는 FIELD_ALIASES 테이블(+ 서비스별 FIELD_ALIAS_OVERRIDES)을
+    초기화 시 한 번 변환한 튜플 테이블로 처리합니다.
+
+    Args:
+        message: 원본 로그 메시지
+        service: 서비스명 (서비스별 별칭 설정 선택용)
+        text_formats: get_text_formats()가 반환한 로그 그룹별 포맷 후보 목록
     """
     parsed = {}
 
     # JSON 로그 파싱 시도
     try:
         if message.strip().startswith('{'):
-            json_data = json.loads(message)
+            json_data = json_loads(message)
 
             # === 모든 JSON 필드를 최상위로 평탄화 ===
             parsed = flatten_json(json_data)
 
             # === 필드 정규화 (일관된 필드명으로 변환) ===
-            # 로그 레벨 정규화
-            level = parsed.get('level') or parsed.get('log_level') or parsed.get('severity')
-            if level:
-                parsed['log_level'] = str(level).upper()
-
-            # 로거 정규화
-            logger_name = parsed.get('logger') or parsed.get('logger_name') or parsed.get('caller')
-            if logger_name:
-                parsed['logger'] = logger_name
-
-            # 스레드 정규화
-            thread = parsed.get('thread') or parsed.get('thread_name')
-            if thread:
-                parsed['thread'] = thread
-
-            # 메시지 정규화 (원본 JSON의 message 필드)
-            if 'message' in parsed and isinstance(parsed['message'], str):
-                parsed['parsed_message'] = parsed['message']
-                del parsed['message']  # raw_message에 원본이 있으므로 중복 제거
-            elif 'msg' in parsed:
-                parsed['parsed_message'] = parsed['msg']
-
-            # 스택 트레이스 정규화
-            stack_trace = parsed.get('stack_trace') or parsed.get('stacktrace') or parsed.get('exception')
-            if stack_trace:
-                parsed['stack_trace'] = stack_trace
-                exception_class = extract_exception_class(str(stack_trace))
-                if exception_class:
-                    parsed['exception_class'] = exception_class
-
-            # HTTP 관련 필드 정규화
-            http_method = parsed.get('http_method') or parsed.get('method') or parsed.get('httpMethod')
-            if http_method:
-                parsed['http_method'] = http_method
-
-            http_path = parsed.get('http_path') or parsed.get('path') or parsed.get('uri') or parsed.get('url')
-            if http_path:
-                parsed['http_path'] = http_path
-
-            status_code = parsed.get('status_code') or parsed.get('statusCode') or parsed.get('status') or parsed.get('http_status')
-            if status_code:
-                parsed['status_code'] = int(status_code) if str(status_code).isdigit() else status_code
-
-            duration = parsed.get('duration') or parsed.get('duration_ms') or parsed.get('response_time') or parsed.get('elapsed')
-            if duration:
-                parsed['duration_ms'] = duration
-
-            client_ip = parsed.get('client_ip') or parsed.get('clientIp') or parsed.get('remote_addr') or parsed.get('ip')
-            if client_ip:
-                parsed['client_ip'] = client_ip
-
-            # 분산 추적 필드 정규화
-            trace_id = parsed.get('trace_id') or parsed.get('traceId') or parsed.get('x-amzn-trace-id')
-            if trace_id:
-                parsed['trace_id'] = trace_id
-
-            span_id = parsed.get('span_id') or parsed.get('spanId')
-            if span_id:
-                parsed['span_id'] = span_id
-
-            request_id = parsed.get('request_id') or parsed.get('requestId') or parsed.get('correlationId')
-            if request_id:
-                parsed['request_id'] = request_id
-
-            # 비즈니스 컨텍스트 정규화
-            user_id = parsed.get('user_id') or parsed.get('userId')
-            if user_id:
-                parsed['user_id'] = user_id
-
-            action = parsed.get('action') or parsed.get('operation')
-            if action:
-                parsed['action'] = action
-
-            app_name = parsed.get('APP_NAME') or parsed.get('application') or parsed.get('service') or parsed.get('SERVICE_NAME')
-            if app_name:
-                parsed['app_name'] = app_name
-
-            env = parsed.get('APP_ENV') or parsed.get('environment') or parsed.get('env') or parsed.get('ENVIRONMENT')
-            if env:
-                parsed['environment'] = env
+            normalize_fields(parsed, service)
 
     except json.JSONDecodeError:
         pass
 
+    if not parsed and text_formats:
+        parsed = parse_text_message(message, text_formats)
+
     return parsed
 
 
-def flatten_json(obj: dict, parent_key: str = '', separator: str = '_') -> dict:
+def get_text_formats(log_group: str) -> list:
+    """
+    로그 그룹의 텍스트 포맷 후보 목록을 반환합니다 (웜 인보케이션 간 캐시).
+
+    목록은 parse_text_message()가 매칭된 포맷을 맨 앞으로 옮기며 갱신하므로,
+    로그 그룹별 포맷이 첫 매칭 이후로는 정규식 한 번으로 결정됩니다.
+    """
+    text_formats = _text_format_cache.get(log_group)
+    if text_formats is None:
+        if len(_text_format_cache) >= TEXT_FORMAT_CACHE_SIZE:
+            _text_format_cache.clear()
+        text_formats = _text_format_cache[log_group] = list(TEXT_LOG_FORMATS)
+    return text_formats
+
+
+def parse_text_message(message: str, text_formats: list) -> dict:
+    """
+    텍스트 로그를 미리 컴파일된 포맷 패턴으로 파싱합니다.
+
+    Args:
+        message: 원본 로그 메시지
+        text_formats: 시도할 포맷 이름 목록 (매칭된 포맷을 맨 앞으로 이동)
+
+    Returns:
+        타입 변환된 필드 딕셔너리 (log_format 포함), 매칭되지 않으면 빈 딕셔너리
+    """
+    for position, format_name in enumerate(text_formats):
+        pattern, converters = TEXT_LOG_FORMATS[format_name]
+        match = pattern.match(message)
+        if match is None:
+            continue
+
+        if position:
+            del text_formats[position]
+            text_formats.insert(0, format_name)
+
+        parsed = {field: value for field, value in match.groupdict().items() if value is not None}
+        for field, convert in converters.items():
+            if field in parsed:
+                parsed[field] = convert(parsed[field])
+        parsed['log_format'] = format_name
+
+        # 여러 줄 메시지(스택 트레이스 포함)에서 Exception 클래스 추출
+        text = parsed.get('parsed_message')
+        if text and '\n' in text:
+            exception_class = extract_exception_class(text)
+            if exception_class:
+                parsed['exception_class'] = exception_class
+
+        return parsed
+
+    return {}
+
+
+def _seconds_to_ms(value: str) -> float:
+    return round(float(value) * 1000, 3)
+
+
+def normalize_fields(parsed: dict, service: str = None):
+    """
+    평탄화된 필드를 별칭 테이블에 따라 표준 필드명으로 정규화합니다 (in-place).
+
+    각 표준 필드는 별칭 목록 중 값이 있는(truthy) 첫 번째 별칭의 값을 갖습니다.
+    """
+    # 메시지 정규화 (원본 JSON의 message 필드)
+    if 'message' in parsed and isinstance(parsed['message'], str):
+        parsed['parsed_message'] = parsed['message']
+        del parsed['message']  # raw_message에 원본이 있으므로 중복 제거
+    elif 'msg' in parsed:
+        parsed['parsed_message'] = parsed['msg']
+
+    for canonical, aliases, transform in _field_alias_tables.get(service, _default_field_aliases):
+        for alias in aliases:
+            # 대부분의 별칭은 없으므로 메서드 호출(get) 대신 in 연산으로 먼저 확인
+            if alias in parsed:
+                value = parsed[alias]
+                if value:
+                    parsed[canonical] = transform(value) if transform else value
+                    break
+
+    # 스택 트레이스에서 Exception 클래스 추출
+    stack_trace = parsed.get('stack_trace')
+    if stack_trace:
+        exception_class = extract_exception_class(str(stack_trace))
+        if exception_class:
+            parsed['exception_class'] = exception_class
+
+
+def _to_log_level(value) -> str:
+    return str(value).upper()
+
+
+def _to_status_code(value):
+    return int(value) if str(value).isdigit() else value
+
+
+def compile_field_aliases(aliases: dict) -> tuple:
+    """
+    {표준 필드: [별칭, ...]} 테이블을 정규화용 튜플 테이블로 변환합니다 (초기화 시 한 번).
+
+    Returns:
+        ((표준 필드, 별칭 튜플, 변환 함수 또는 None), ...) - 별칭이 없는 필드는 제외
+    """
+    return tuple(
+        (canonical, tuple(alias_list), FIELD_TRANSFORMS.get(canonical))
+        for canonical, alias_list in aliases.items()
+        if alias_list
+    )
+
+
+def _load_field_alias_tables(overrides_json: str) -> dict:
+    """
+    서비스별 별칭 설정을 기본 테이블과 병합하여 컴파일합니다.
+    서비스 설정의 별칭이 기본 별칭보다 우선합니다.
+
+    형식: {"<service>": {"<표준 필드>": ["별칭", ...]}}
+    """
+    if not overrides_json:
+        return {}
+
+    try:
+        overrides = json.loads(overrides_json)
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid FIELD_ALIAS_OVERRIDES, using default aliases: {e}")
+        return {}
+
+    tables = {}
+    for service, service_aliases in overrides.items():
+        merged = {canonical: list(alias_list) for canonical, alias_list in FIELD_ALIASES.items()}
+        for canonical, alias_list in service_aliases.items():
+            if not isinstance(alias_list, list) or not all(isinstance(alias, str) for alias in alias_list):
+                logger.error(f"Invalid FIELD_ALIAS_OVERRIDES entry for {service}.{canonical}, skipping")
+                continue
+            default_aliases = [alias for alias in merged.get(canonical, []) if alias not in alias_list]
+            merged[canonical] = list(alias_list) + default_aliases
+        tables[service] = compile_field_aliases(merged)
+    return tables
+
+
+def flatten_json(obj: dict, parent_key: str = '', separator: str = '_',
+                 max_depth: int = None, max_fields: int = None) -> dict:
     """
     중첩된 JSON 객체를 평탄화합니다.
 
+    재귀 대신 명시적 스택으로 하나의 결과 딕셔너리에 직접 기록합니다
+    (하위 딕셔너리 생성/병합이 없어 기존 재귀 구현보다 빠름, bench_fields.py 참고).
+    깊이(max_depth)나 필드 수(max_fields) 한도를 넘는 값은 개별 필드로 만들지 않고
+    OVERFLOW_FIELD 하나에 JSON 문자열로 모아 인덱스 매핑이 늘어나지 않도록 합니다.
+    객체/배열을 담은 배열은 한도 밖에서 필드가 무제한으로 매핑되므로 항상 OVERFLOW_FIELD로 보냅니다.
+
     Args:
         obj: 평탄화할 JSON 객체
-        parent_key: 부모 키 (재귀 호출용)
+        parent_key: 키 접두어
         separator: 키 구분자
+        max_depth: 최대 중첩 깊이 (기본값: FLATTEN_MAX_DEPTH, 최상위 키가 깊이 1)
+        max_fields: 최대 필드 수 (기본값: FLATTEN_MAX_FIELDS, overflow 필드 제외)
 
     Returns:
         평탄화된 딕셔너리
 
     예시:
         {'a': {'b': 1, 'c': 2}} → {'a_b': 1, 'a_c': 2}
-        {'items': [1, 2, 3]} → {'items': [1, 2, 3]}  # 배열은 그대로 유지
+        {'items': [1, 2, 3]} → {'items': [1, 2, 3]}  # 값 배열은 그대로 유지
+        {'items': [{'id': 1}]} → {'overflow': '{"items":[{"id":1}]}'}  # 객체 배열은 overflow
+        max_depth=1: {'a': {'b': 1}, 'c': 2} → {'c': 2, 'overflow': '{"a":{"b":1}}'}
     """
-    items = {}
-
-    for key, value in obj.items():
-        new_key = f"{parent_key}{separator}{key}" if parent_key else key
+    if max_depth is None:
+        max_depth = FLATTEN_MAX_DEPTH
+    if max_fields is None:
+        max_fields = FLATTEN_MAX_FIELDS
 
-        if isinstance(value, dict):
-            # 중첩된 객체는 재귀적으로 평탄화
-            items.update(flatten_json(value, new_key, separator))
-        elif isinstance(value, list):
-            # 리스트는 그대로 유지 (OpenSearch에서 배열 지원)
-            items[new_key] = value
+    items = {}
+    overflow = {}
+
+    # (키 접두어, 항목 이터레이터, 깊이) - 깊이 우선으로 원래 키 순서 유지
+    stack = [(parent_key, iter(obj.items()), 1)]
+    while stack:
+        prefix, entries, depth = stack[-1]
+        for key, value in entries:
+            new_key = f"{prefix}{separator}{key}" if prefix else key
+
+            if isinstance(value, dict):
+                if not value:
+                    continue
+                if depth < max_depth:
+                    # 중첩된 객체는 하위 항목을 먼저 처리
+                    stack.append((new_key, iter(value.items()), depth + 1))
+                    break
+                overflow[new_key] = value
+            elif isinstance(value, list) and any(isinstance(element, (dict, list)) for element in value):
+                # 배열 안의 객체는 깊이/필드 수 한도 없이 매핑되므로 평탄화하지 않고 overflow로 보냄
+                overflow[new_key] = value
+            elif len(items) < max_fields:
+                # 값 배열은 그대로 유지 (OpenSearch에서 배열 지원), 기본 값도 그대로 저장
+                items[new_key] = value
+            else:
+                overflow[new_key] = value
         else:
-            # 기본 값은 그대로 저장
-            items[new_key] = value
+            stack.pop()
+
+    if overflow:
+        items[OVERFLOW_FIELD] = json_dumps(overflow).decode('utf-8')
 
     return items
 
 
-def extract_exception_class(stack_trace: str) -> str:
+def extract_exception_class(stack_trace: str, max_lines: int = None) -> str:
     """
     스택 트레이스에서 Exception 클래스명을 추출합니다.
+
+    *Exception 토큰이 있으면 가장 앞의 것을, 없으면 가장 앞의 *Error 토큰을
+    패키지명을 제외한 클래스명으로 반환합니다.
+
+    'Exception'/'Error' 리터럴 위치를 한 번 스캔하면서 해당 위치를 포함하는
+    식별자 체인(com.foo.BarException)만 확장하므로, 긴 트레이스에서도
+    패키지 경로마다 정규식 역추적이 발생하지 않습니다.
+    대부분의 트레이스는 첫 줄에 Exception이 있어 첫 매칭에서 바로 끝납니다.
+
+    Args:
+        stack_trace: 스택 트레이스 문자열
+        max_lines: 앞에서부터 검사할 최대 줄 수 (기본값: EXCEPTION_SCAN_MAX_LINES, 0이면 전체)
     """
     if not stack_trace:
         return None
 
-    patterns = [
-        r'([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*Exception)',
-        r'([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*Error)',
-        r'([A-Z][a-zA-Z0-9]*Exception)',
-        r'([A-Z][a-zA-Z0-9]*Error)',
-    ]
+    if max_lines is None:
+        max_lines = EXCEPTION_SCAN_MAX_LINES
+
+    # 검사 범위를 앞쪽 max_lines 줄로 제한 - 줄 수는 후보 위치까지만 이어서 세므로
+    # 대부분 첫 줄에서 끝나는 트레이스에 미리 줄 경계를 계산하는 비용이 들지 않음
+    endpos = len(stack_trace)
+    newline_count = 0
+    counted_to = 0
+
+    first_error = None
+
+    for match in EXCEPTION_SUFFIX_PATTERN.finditer(stack_trace):
+        suffix = match.group(0)
+        suffix_start = match.start()
+
+        if max_lines > 0:
+            newline_count += stack_trace.count('\n', counted_to, suffix_start)
+            counted_to = suffix_start
+            if newline_count >= max_lines:
+                break
 
-    for pattern in patterns:
-        match = re.search(pattern, stack_trace)
-        if match:
-            full_class = match.group(1)
-            return full_class.split('.')[-1]
+        if suffix == 'Error' and first_error is not None:
+            continue
 
-    return None
+        # 접미사 앞에는 식별자 문자가 최소 한 개 있어야 함 (예: 'Exception' 단독은 제외)
+        if suffix_start == 0 or stack_trace[suffix_start - 1] not in IDENTIFIER_CHARS:
+            continue
 
+        chain_start, chain_end = _identifier_chain_bounds(stack_trace, suffix_start, endpos)
+        if chain_start >= suffix_start:
+            continue
 
-def _get_sigv4_session():
-    """SigV4 서명을 위한 botocore session과 credentials를 반환합니다."""
-    from botocore.auth import SigV4Auth
-    from botocore.awsrequest import AWSRequest
-    import botocore.session
+        # 같은 체인 안에서 가장 뒤쪽의 유효한 접미사까지 포함 (예: a.FooErrorException)
+        end = stack_trace.rfind(suffix, suffix_start, chain_end)
+        while stack_trace[end - 1] == '.':
+            end = stack_trace.rfind(suffix, suffix_start, end)
 
-    session = botocore.session.get_session()
-    credentials = session.get_credentials()
-    return session, credentials, SigV4Auth, AWSRequest
+        class_name = stack_trace[chain_start:end + len(suffix)].rsplit('.', 1)[-1]
+        if suffix == 'Exception':
+            return class_name
+        first_error = class_name
 
+    return first_error
 
-def ensure_index_exists(index_name: str):
+
+def _identifier_chain_bounds(text: str, pos: int, endpos: int) -> tuple:
     """
-    인덱스가 존재하지 않으면 최적화된 설정으로 생성합니다.
-    단일 노드 클러스터에 맞게 shards=1, replicas=0으로 설정합니다.
+    pos 위치의 문자를 포함하는 식별자 체인([a-zA-Z_][a-zA-Z0-9_]*를 '.'으로 연결)의
+    [start, end) 범위를 반환합니다. 체인 시작은 영문자 또는 '_'입니다.
+    """
+    start = pos
+    while start > 0:
+        char = text[start - 1]
+        if char in IDENTIFIER_CHARS:
+            start -= 1
+        elif (char == '.' and start >= 2 and text[start - 2] in IDENTIFIER_CHARS
+              and text[start] in IDENTIFIER_START_CHARS):
+            start -= 1
+        else:
+            break
+
+    # 앞쪽 숫자/구분자는 체인 시작이 될 수 없음
+    while start < pos and text[start] not in IDENTIFIER_START_CHARS:
+        start += 1
+
+    end = pos
+    while end < endpos:
+        char = text[end]
+        if char in IDENTIFIER_CHARS:
+            end += 1
+        elif (char == '.' and end + 1 < endpos and text[end + 1] in IDENTIFIER_START_CHARS
+              and text[end - 1] in IDENTIFIER_CHARS):
+            end += 1
+        else:
+            break
+
+    return start, end
+
+
+def _get_sigv4_credentials() -> tuple:
+    """
+    SigV4 서명용 credentials (access_key, secret_key, session_token)를 반환합니다.
+    Lambda 실행 환경은 역할 credentials를 환경 변수로 주입하므로 한 번만 읽어 캐시합니다.
+    """
+    global _sigv4_credentials
+
+    if _sigv4_credentials is None:
+        _sigv4_credentials = (
+            os.environ.get('AWS_ACCESS_KEY_ID', ''),
+            os.environ.get('AWS_SECRET_ACCESS_KEY', ''),
+            os.environ.get('AWS_SESSION_TOKEN', ''),
+        )
+    return _sigv4_credentials
+
+
+def get_signature_key(secret_key: str, date_stamp: str, region: str, service: str) -> bytes:
+    """
+    SigV4 signing key를 반환합니다.
+    signing key는 (날짜, 리전, 서비스)가 같으면 동일하므로 하루 단위로 캐시합니다.
+
+    Bulk 전송 스레드에서 동시에 호출되므로 캐시를 순회하거나 비우지 않고,
+    (리전, 서비스)별 (날짜, 키) 튜플을 통째로 교체합니다. 날짜가 바뀌면 이전 키는 덮어써집니다.
+    """
+    cache_key = (region, service)
+    cached = _signing_key_cache.get(cache_key)
+    if cached is not None and cached[0] == date_stamp:
+        return cached[1]
+
+    k_date = hmac.new(('AWS4' + secret_key).encode('utf-8'), date_stamp.encode('utf-8'), hashlib.sha256).digest()
+    k_region = hmac.new(k_date, region.encode('utf-8'), hashlib.sha256).digest()
+    k_service = hmac.new(k_region, service.encode('utf-8'), hashlib.sha256).digest()
+    signing_key = hmac.new(k_service, b'aws4_request', hashlib.sha256).digest()
+    _signing_key_cache[cache_key] = (date_stamp, signing_key)
+    return signing_key
+
+
+def sign_request(method: str, url: str, body: bytes = None, headers: dict = None,
+                 service: str = 'es', region: str = None, timestamp: datetime = None) -> dict:
+    """
+    요청에 AWS SigV4 서명을 추가한 헤더를 반환합니다 (표준 라이브러리만 사용).
+
+    botocore SigV4Auth와 동일하게 전달된 헤더와 host를 모두 서명하며,
+    S3 요청에는 x-amz-content-sha256 헤더를 함께 추가합니다.
+
+    Args:
+        method: HTTP 메서드
+        url: 전체 URL (https://host/path?query)
+        body: 요청 본문
+        headers: 추가 헤더 (Content-Type 등)
+        service: AWS 서비스명 (기본값: es)
+        region: AWS 리전 (기본값: OPENSEARCH_REGION)
+        timestamp: 서명 시각 (기본값: 현재 UTC)
+
+    Returns:
+        서명 헤더가 포함된 헤더 딕셔너리
+    """
+    access_key, secret_key, session_token = _get_sigv4_credentials()
+    region = region or OPENSEARCH_REGION
+
+    parsed_url = urlsplit(url)
+    t = timestamp or datetime.utcnow()
+    amz_date = t.strftime('%Y%m%dT%H%M%SZ')
+    date_stamp = amz_date[:8]
+
+    payload_hash = hashlib.sha256(body or b'').hexdigest()
+
+    signed = dict(headers or {})
+    signed['X-Amz-Date'] = amz_date
+    if session_token:
+        signed['X-Amz-Security-Token'] = session_token
+    if service == 's3':
+        signed['X-Amz-Content-SHA256'] = payload_hash
+
+    # Canonical headers (소문자 이름 정렬, 값 앞뒤 공백 제거)
+    canonical_header_map = {name.lower(): ' '.join(str(value).split()) for name, value in signed.items()}
+    canonical_header_map['host'] = parsed_url.netloc
+    signed_header_names = sorted(canonical_header_map)
+    canonical_headers = ''.join(f"{name}:{canonical_header_map[name]}\n" for name in signed_header_names)
+    signed_headers = ';'.join(signed_header_names)
+
+    # Canonical query string (키/값 URI 인코딩 후 정렬)
+    query_params = sorted(
+        (quote(key, safe='-_.~'), quote(value, safe='-_.~'))
+        for key, value in parse_qsl(parsed_url.query, keep_blank_values=True)
+    )
+    canonical_querystring = '&'.join(f"{key}={value}" for key, value in query_params)
+
+    canonical_request = '\n'.join([
+        method,
+        quote(parsed_url.path or '/', safe='/~'),
+        canonical_querystring,
+        canonical_headers,
+        signed_headers,
+        payload_hash
+    ])
+
+    credential_scope = f"{date_stamp}/{region}/{service}/aws4_request"
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256',
+        amz_date,
+        credential_scope,
+        hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+    ])
+
+    signing_key = get_signature_key(secret_key, date_stamp, region, service)
+    signature = hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    signed['Authorization'] = (
+        f"AWS4-HMAC-SHA256 Credential={access_key}/{credential_scope}, "
+        f"SignedHeaders={signed_headers}, Signature={signature}"
+    )
+    return signed
+
+
+class HTTPSConnectionPool:
+    """
+    단일 호스트용 keep-alive HTTPS 커넥션 풀입니다.
+
+    urlopen은 요청마다 새 TLS 연결을 맺으므로, 커넥션을 풀에 보관하여
+    warm invocation 간에도 재사용합니다. 스레드 안전하며 풀이 비어 있으면
+    새 커넥션을 생성하고, 최대 크기를 넘는 커넥션은 반납 시 닫습니다.
+    """
+
+    def __init__(self, host: str, max_size: int = 4):
+        self.host = host
+        self.max_size = max_size
+        self._ssl_context = ssl.create_default_context()
+        self._connections = queue.LifoQueue(maxsize=max_size)
+
+    def _acquire(self, timeout: float) -> tuple:
+        """풀에서 커넥션을 꺼내거나 새로 생성합니다. (connection, reused)"""
+        try:
+            conn = self._connections.get_nowait()
+            reused = True
+        except queue.Empty:
+            conn = http.client.HTTPSConnection(self.host, timeout=timeout, context=self._ssl_context)
+            reused = False
+
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, reused
+
+    def _release(self, conn: http.client.HTTPSConnection):
+        try:
+            self._connections.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(self, method: str, path: str, body: bytes = None,
+                headers: dict = None, timeout: float = 30) -> tuple:
+        """
+        요청을 전송하고 (status, response_body)를 반환합니다.
+
+        재사용한 커넥션이 서버 측에서 이미 닫혀 있던 경우(idle timeout)
+        새 커넥션으로 한 번만 재시도합니다.
+        """
+        conn, reused = self._acquire(timeout)
+
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            if not reused:
+                raise
+            conn = http.client.HTTPSConnection(self.host, timeout=timeout, context=self._ssl_context)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+            except Exception:
+                conn.close()
+                raise
+        except Exception:
+            conn.close()
+            raise
+
+        try:
+            # 커넥션 재사용을 위해 응답 본문은 반드시 끝까지 읽음
+            response_body = response.read()
+        except Exception:
+            conn.close()
+            raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+
+        return response.status, response_body
+
+
+def get_connection_pool() -> HTTPSConnectionPool:
+    """OpenSearch 커넥션 풀을 반환합니다 (lazy 초기화)."""
+    global _connection_pool
+    if _connection_pool is None or _connection_pool.host != OPENSEARCH_ENDPOINT:
+        max_concurrency = max(BULK_CONCURRENCY, BULK_MAX_CONCURRENCY if BULK_ADAPTIVE else 1)
+        _connection_pool = HTTPSConnectionPool(OPENSEARCH_ENDPOINT, max_size=max_concurrency + 1)
+    return _connection_pool
+
+
+def get_bulk_executor() -> ThreadPoolExecutor:
+    """Bulk 청크 동시 전송용 스레드 풀을 반환합니다 (lazy 초기화)."""
+    global _bulk_executor
+    if _bulk_executor is None:
+        max_workers = max(BULK_CONCURRENCY, BULK_MAX_CONCURRENCY if BULK_ADAPTIVE else 1)
+        _bulk_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bulk')
+    return _bulk_executor
+
+
+def opensearch_request(method: str, path: str, body: bytes = None,
+                       content_type: str = 'application/json', timeout: float = 30) -> tuple:
+    """
+    SigV4 서명된 요청을 커넥션 풀을 통해 OpenSearch로 전송합니다.
+
+    Returns:
+        (status, response_body)
+    """
+    url = f"https://{OPENSEARCH_ENDPOINT}{path}"
+    headers = {'Content-Type': content_type} if body is not None else {}
+    headers = sign_request(method, url, body, headers)
+
+    return get_connection_pool().request(method, path, body=body, headers=headers, timeout=timeout)
+
+
+class ExpiringLRUCache:
+    """
+    크기와 유효 시간이 제한된 LRU 집합입니다.
+
+    - max_size를 넘으면 가장 오래 사용되지 않은 키부터 제거
+    - 추가 후 ttl_seconds가 지난 키는 없는 것으로 취급
     """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._expires_at = OrderedDict()
+
+    def __contains__(self, key) -> bool:
+        expires_at = self._expires_at.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._expires_at[key]
+            return False
+        self._expires_at.move_to_end(key)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._expires_at)
+
+    def add(self, key):
+        self._expires_at[key] = time.monotonic() + self.ttl_seconds
+        self._expires_at.move_to_end(key)
+        while len(self._expires_at) > self.max_size:
+            self._expires_at.popitem(last=False)
+
+    def discard(self, key):
+        self._expires_at.pop(key, None)
+
+
+def get_existing_indices() -> ExpiringLRUCache:
+    """확인된 인덱스 캐시를 반환합니다 (Lambda 실행 컨텍스트 내 재사용)."""
     global _existing_indices
 
-    if index_name in _existing_indices:
-        return
+    if _existing_indices is None:
+        _existing_indices = ExpiringLRUCache(INDEX_CACHE_MAX_SIZE, INDEX_CACHE_TTL_SECONDS)
+    return _existing_indices
 
-    if not OPENSEARCH_ENDPOINT:
-        return
 
-    url = f"https://{OPENSEARCH_ENDPOINT}/{index_name}"
+def ensure_index_template() -> bool:
+    """
+    logs-* 인덱스 템플릿(INDEX_SETTINGS)이 등록되어 있는지 확인하고, 없으면 등록합니다.
+    등록이 확인되면 실행 컨텍스트 동안 다시 확인하지 않고 새 인덱스는 Bulk 요청의 자동 생성에 맡깁니다.
+    실패한 경우 INDEX_CACHE_TTL_SECONDS 동안은 인덱스 직접 확인으로 대체하고, 이후 다시 확인합니다.
+
+    Returns:
+        템플릿 사용 가능 여부
+    """
+    global _index_template_ready, _index_template_checked_at
+
+    now = time.monotonic()
+    if _index_template_ready or (
+        _index_template_ready is not None and now - _index_template_checked_at < INDEX_CACHE_TTL_SECONDS
+    ):
+        return _index_template_ready
+    _index_template_checked_at = now
 
+    path = f"/_index_template/{INDEX_TEMPLATE_NAME}"
     try:
-        _, credentials, SigV4Auth, AWSRequest = _get_sigv4_session()
+        status, _ = opensearch_request('GET', path, timeout=5)
+        if status == 404:
+            template_body = json_dumps({
+                "index_patterns": [f"{INDEX_PREFIX}-*"],
+                "priority": INDEX_TEMPLATE_PRIORITY,
+                "template": INDEX_SETTINGS,
+            })
+            status, response_body = opensearch_request('PUT', path, body=template_body, timeout=10)
+            if status < 300:
+                logger.info(f"Registered index template {INDEX_TEMPLATE_NAME} (shards=1, replicas=0)")
+            else:
+                logger.warning(f"Failed to register index template: HTTP {status} {response_body[:500]}")
 
-        # HEAD 요청으로 인덱스 존재 여부 확인
-        head_request = AWSRequest(method='HEAD', url=url, headers={})
-        SigV4Auth(credentials, 'es', OPENSEARCH_REGION).add_auth(head_request)
-        req = Request(url, headers=dict(head_request.headers), method='HEAD')
+        _index_template_ready = status < 300
 
-        try:
-            urlopen(req, timeout=5)
-            _existing_indices.add(index_name)
+    except Exception as e:
+        logger.warning(f"Failed to ensure index template {INDEX_TEMPLATE_NAME}: {e}")
+        _index_template_ready = False
+
+    if not _index_template_ready:
+        logger.warning("Index template unavailable, falling back to per-flush index checks")
+    return _index_template_ready
+
+
+def ensure_indices_exist(index_names):
+    """
+    인덱스 템플릿이 있으면 아무것도 하지 않고 Bulk 자동 생성에 맡깁니다.
+
+    템플릿을 사용할 수 없는 경우에만 캐시에 없는 인덱스를 한 번의 다중 인덱스
+    요청으로 확인하고, 없는 인덱스를 최적화된 설정으로 생성합니다.
+    """
+    if not index_names or ensure_index_template():
+        return
+
+    existing_indices = get_existing_indices()
+    missing = sorted(index_name for index_name in index_names if index_name not in existing_indices)
+    if not missing:
+        return
+
+    try:
+        # 존재하는 인덱스만 응답에 포함됨 (ignore_unavailable)
+        status, response_body = opensearch_request(
+            'GET', f"/{','.join(missing)}/_settings/index.number_of_shards?ignore_unavailable=true", timeout=5
+        )
+        if status >= 300:
+            logger.warning(f"Index check failed for {missing}: HTTP {status}")
             return
-        except HTTPError as e:
-            if e.code != 404:
-                logger.warning(f"Index check failed for {index_name}: {e}")
-                return
+        found = json_loads(response_body)
+    except Exception as e:
+        logger.warning(f"Failed to check indices {missing}: {e}")
+        return
+
+    for index_name in missing:
+        if index_name in found:
+            existing_indices.add(index_name)
+        else:
+            create_index(index_name)
 
-        # 인덱스가 없으면 설정과 함께 생성
-        create_body = json.dumps(INDEX_SETTINGS)
-        headers = {'Content-Type': 'application/json'}
-        put_request = AWSRequest(method='PUT', url=url, data=create_body, headers=headers)
-        SigV4Auth(credentials, 'es', OPENSEARCH_REGION).add_auth(put_request)
 
-        req = Request(url, data=create_body.encode('utf-8'), headers=dict(put_request.headers), method='PUT')
-        urlopen(req, timeout=10)
-        _existing_indices.add(index_name)
+def create_index(index_name: str):
+    """
+    인덱스를 최적화된 설정으로 생성합니다.
+    단일 노드 클러스터에 맞게 shards=1, replicas=0으로 설정합니다.
+    """
+    try:
+        create_body = json_dumps(INDEX_SETTINGS)
+        status, response_body = opensearch_request('PUT', f"/{index_name}", body=create_body, timeout=10)
+
+        # 동시 실행 중인 다른 Lambda가 먼저 생성한 경우도 존재하는 것으로 처리
+        if status == 400 and b'resource_already_exists_exception' in response_body:
+            get_existing_indices().add(index_name)
+            return
+        if status >= 300:
+            logger.warning(f"Failed to create index {index_name}: HTTP {status} {response_body[:500]}")
+            return
+
+        get_existing_indices().add(index_name)
         logger.info(f"Created index {index_name} with optimized settings (shards=1, replicas=0)")
 
     except Exception as e:
-        logger.warning(f"Failed to ensure index {index_name}: {e}")
+        logger.warning(f"Failed to create index {index_name}: {e}")
 
 
-def bulk_index_to_opensearch(documents: list) -> tuple:
+class AdaptiveBulkController:
     """
-    OpenSearch Bulk API로 문서를 전송합니다.
+    OpenSearch 응답을 바탕으로 Bulk 청크 문서 수와 동시 전송 수를 AIMD 방식으로 조정합니다.
 
-    Args:
-        documents: [{'index': 'index-name', 'document': {...}}, ...]
+    - took이 BULK_TARGET_TOOK_MS 이하이고 거절이 없으면, 청크가 문서 수 한도까지 찼던
+      경우에만 청크를 BULK_DOCUMENTS_STEP씩 늘리고, 동시 전송 수만큼 전송 중이던
+      응답이 연속 GROWTH_STREAK번 이어지면 동시 전송 수를 1 늘림
+      (작은 청크나 한가한 인보케이션의 빠른 응답으로는 한도를 키우지 않음)
+    - took이 목표를 넘으면 청크를 DECREASE_FACTOR_SLOW배로 줄임
+    - 429/503 거절이나 요청 실패가 있으면 청크와 동시 전송 수를 절반으로 줄임
 
-    Returns:
-        (success_count, error_count)
+    상태는 모듈 전역에 유지되어 웜 인보케이션 간에 이어지며,
+    전송 스레드에서 호출되므로 lock으로 보호합니다.
     """
-    if not documents or not OPENSEARCH_ENDPOINT:
-        logger.warning("No documents to index or OPENSEARCH_ENDPOINT not set")
-        return 0, 0
 
-    # 인덱스 존재 확인 및 생성 (최적화된 설정 적용)
-    unique_indices = {doc['index'] for doc in documents}
-    for index_name in unique_indices:
-        ensure_index_exists(index_name)
+    GROWTH_STREAK = 10
+    DECREASE_FACTOR_SLOW = 0.75
+    DECREASE_FACTOR_THROTTLED = 0.5
+
+    def __init__(self, documents: int, concurrency: int, min_documents: int,
+                 max_documents: int, max_concurrency: int):
+        self.min_documents = min(min_documents, documents)
+        self.max_documents = max(max_documents, documents)
+        self.max_concurrency = max(max_concurrency, concurrency)
+        self.documents = documents
+        self.concurrency = max(1, concurrency)
+
+        self._lock = threading.Lock()
+        self._streak = 0
+        self._requests = 0
+        self._throttled = 0
+        self._took_total = 0
+        self._took_count = 0
+
+    def observe(self, took_ms: int | None, throttled: bool, documents: int = 0, in_flight: int = 0):
+        """
+        Bulk 응답 하나를 반영합니다.
+
+        Args:
+            took_ms: 응답의 took (None이면 응답을 받지 못한 요청)
+            throttled: 429/503 거절 여부
+            documents: 요청의 문서 수
+            in_flight: 요청 전송 시점의 동시 전송 수 (이 요청 포함)
+        """
+        with self._lock:
+            self._requests += 1
+            if took_ms is not None:
+                self._took_total += took_ms
+                self._took_count += 1
+
+            if throttled or took_ms is None:
+                self._throttled += 1
+                self._streak = 0
+                self.documents = max(self.min_documents, int(self.documents * self.DECREASE_FACTOR_THROTTLED))
+                self.concurrency = max(1, self.concurrency // 2)
+            elif took_ms > BULK_TARGET_TOOK_MS:
+                self._streak = 0
+                self.documents = max(self.min_documents, int(self.documents * self.DECREASE_FACTOR_SLOW))
+            else:
+                if documents >= self.documents:
+                    self.documents = min(self.max_documents, self.documents + BULK_DOCUMENTS_STEP)
+                if in_flight >= self.concurrency:
+                    self._streak += 1
+                    if self._streak >= self.GROWTH_STREAK and self.concurrency < self.max_concurrency:
+                        self.concurrency += 1
+                        self._streak = 0
+
+    def export_metrics(self) -> dict:
+        """현재 제어 값과 마지막 내보내기 이후의 요청 통계를 반환하고 통계를 초기화합니다."""
+        with self._lock:
+            metrics = {
+                'BulkDocumentsLimit': self.documents,
+                'BulkConcurrency': self.concurrency,
+                'BulkRequests': self._requests,
+                'BulkThrottled': self._throttled,
+                'BulkTookMs': self._took_total / self._took_count if self._took_count else 0,
+            }
+            self._requests = self._throttled = self._took_total = self._took_count = 0
+        return metrics
+
+
+def get_bulk_controller() -> AdaptiveBulkController:
+    """적응형 Bulk 제어 상태를 반환합니다 (lazy 초기화, 웜 인보케이션 간 유지)."""
+    global _bulk_controller
+    if _bulk_controller is None:
+        _bulk_controller = AdaptiveBulkController(
+            BULK_MAX_DOCUMENTS, BULK_CONCURRENCY, BULK_MIN_DOCUMENTS,
+            BULK_DOCUMENTS_LIMIT, BULK_MAX_CONCURRENCY,
+        )
+    return _bulk_controller
+
+
+def emit_metrics(metrics: dict):
+    """
+    지표를 CloudWatch Embedded Metric Format으로 기록합니다.
+    Lambda 로그 줄 그대로 파싱되어야 하므로 logger 접두어 없이 stdout에 출력합니다.
+    """
+    if not metrics.get('BulkRequests'):
+        return
 
-    # Bulk API 형식으로 변환
-    # 각 문서는 action + document 두 줄로 구성
-    bulk_body_lines = []
-    for doc_item in documents:
-        index_name = doc_item['index']
-        document = doc_item['document']
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [[]],
+                'Metrics': [
+                    {'Name': name, 'Unit': 'Milliseconds' if name.endswith('Ms') else 'Count'}
+                    for name in metrics
+                ],
+            }],
+        },
+        **metrics,
+    }))
+
+
+class CircuitBreaker:
+    """
+    OpenSearch 요청의 연속 실패를 감지하는 서킷 브레이커입니다.
 
-        # Action line
-        action = {"index": {"_index": index_name}}
-        bulk_body_lines.append(json.dumps(action))
-        # Document line
-        bulk_body_lines.append(json.dumps(document))
+    - closed: 요청 허용, 연속 실패가 failure_threshold에 도달하면 open
+    - open: cooldown_seconds 동안 요청 차단 (호출자는 즉시 스필/재처리)
+    - half-open: cooldown 후 시험 요청 하나만 허용, 성공하면 closed, 실패하면 다시 open
 
-    # NDJSON 형식 (각 줄 끝에 newline, 마지막에도 newline)
-    bulk_body = '\n'.join(bulk_body_lines) + '\n'
+    상태는 모듈 전역에 유지되어 웜 인보케이션 간에 이어지며,
+    전송 스레드에서 호출되므로 lock으로 보호합니다.
+    """
 
-    # OpenSearch Bulk API 호출
-    url = f"https://{OPENSEARCH_ENDPOINT}/_bulk"
-    headers = {
-        'Content-Type': 'application/x-ndjson'
-    }
+    def __init__(self, failure_threshold: int, cooldown_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial_in_flight or time.monotonic() - self.opened_at < self.cooldown_seconds:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("OpenSearch recovered, closing circuit")
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or (self.opened_at is None and self.failures >= self.failure_threshold):
+                logger.error(
+                    f"Opening circuit after {self.failures} consecutive failures "
+                    f"(cooldown {self.cooldown_seconds}s)"
+                )
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """서킷 브레이커를 반환합니다 (lazy 초기화, 웜 인보케이션 간 유지)."""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN_SECONDS)
+    return _circuit_breaker
+
+
+def _spill_object_key() -> str:
+    """스필 파일 키를 생성합니다 (시간 단위 디렉터리 + 고유 파일명)."""
+    now = datetime.utcnow()
+    return f"{now:%Y/%m/%d/%H}/{now:%Y%m%dT%H%M%S}-{os.urandom(6).hex()}.ndjson.gz"
+
+
+class LocalSpillSink:
+    """로컬 디렉터리에 스필 파일을 저장합니다 (테스트/로컬 실행용)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def write(self, data: bytes) -> str:
+        path = os.path.join(self.directory, _spill_object_key())
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # 쓰는 중인 파일이 재처리 대상으로 읽히지 않도록 임시 파일에 쓴 뒤 이동
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return path
+
+
+class S3SpillSink:
+    """S3 버킷에 스필 파일을 저장합니다 (SigV4 서명 PUT, 표준 라이브러리만 사용)."""
+
+    def __init__(self, bucket: str, prefix: str = ''):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.host = f"{bucket}.s3.{OPENSEARCH_REGION}.amazonaws.com"
+        self._pool = HTTPSConnectionPool(self.host, max_size=1)
+
+    def write(self, data: bytes) -> str:
+        key = f"{self.prefix}/{_spill_object_key()}" if self.prefix else _spill_object_key()
+        path = '/' + quote(key)
+        headers = sign_request(
+            'PUT', f"https://{self.host}{path}", data,
+            {'Content-Type': 'application/gzip'}, service='s3',
+        )
+
+        status, response_body = self._pool.request('PUT', path, body=data, headers=headers, timeout=10)
+        if status >= 300:
+            raise RuntimeError(f"S3 PUT failed: HTTP {status} {response_body[:300]}")
+        return f"s3://{self.bucket}/{key}"
+
+
+def get_spill_sink():
+    """SPILL_TARGET에 해당하는 스필 저장소를 반환합니다 (설정이 없으면 None)."""
+    global _spill_sink
+    if _spill_sink is None and SPILL_TARGET:
+        target = urlsplit(SPILL_TARGET)
+        if target.scheme == 'file':
+            _spill_sink = LocalSpillSink(target.path)
+        elif target.scheme == 's3':
+            _spill_sink = S3SpillSink(target.netloc, target.path)
+        else:
+            logger.error(f"Unsupported SPILL_TARGET: {SPILL_TARGET}")
+    return _spill_sink
 
-    try:
-        _, credentials, SigV4Auth, AWSRequest = _get_sigv4_session()
-
-        request = AWSRequest(method='POST', url=url, data=bulk_body, headers=headers)
-        SigV4Auth(credentials, 'es', OPENSEARCH_REGION).add_auth(request)
-
-        req = Request(url, data=bulk_body.encode('utf-8'), headers=dict(request.headers), method='POST')
-        response = urlopen(req, timeout=30)
-        response_body = json.loads(response.read().decode('utf-8'))
-
-        # 결과 분석
-        success_count = 0
-        error_count = 0
-
-        if response_body.get('errors', False):
-            for item in response_body.get('items', []):
-                index_result = item.get('index', {})
-                if index_result.get('status', 0) >= 400:
-                    error_count += 1
-                    logger.error(f"Index error: {index_result}")
-                else:
-                    success_count += 1
+
+class BulkWriter:
+    """
+    문서를 NDJSON으로 바로 직렬화하여 재사용 버퍼에 쌓고, 청크 단위로 전송합니다.
+
+    - 버퍼가 BULK_MAX_BYTES / BULK_MAX_DOCUMENTS에 도달하면 청크를 전송
+      (한 문서가 max_bytes보다 커도 단독 청크로 전송, 문서 단위로는 분할 불가)
+    - 청크는 BULK_CONCURRENCY개까지 스레드 풀에서 동시에 전송되며,
+      메모리에 올라가는 청크 수도 그만큼으로 제한
+    - 429/503으로 거절된 문서는 직렬화된 바이트를 그대로 보관했다가
+      close() 시 jitter 지수 백오프로 더 작은 후속 Bulk 요청에 재전송
+      (Lambda 마감 시각 안에서만 재시도)
+    - 요청 타임아웃은 남은 시간으로 제한하고, 마감 전에 끝낼 수 없는 청크는
+      보내지 않고 재처리 대상으로 반환 (DeadlineScheduler)
+    - max_documents를 지정하지 않으면 청크 문서 수와 동시 전송 수를
+      AdaptiveBulkController가 OpenSearch 응답에 따라 조정 (BULK_ADAPTIVE)
+    - 서킷 브레이커가 열려 있고 스필 저장소(SPILL_TARGET)가 있으면 청크를 전송하지 않고
+      gzip NDJSON으로 저장 (저장에 실패하면 즉시 재처리 대상으로 반환).
+      스필 저장소가 없으면 브레이커와 관계없이 전송하여 Kinesis 재시도를 아낌
+    - 매핑 오류(400) 등 영구 오류는 재시도하지 않고 즉시 실패 처리
+    - 문서는 event_id를 _id로 하는 create 작업으로 전송되어, Kinesis 재처리나
+      재시도로 같은 문서가 다시 전송되어도 중복 저장되지 않음 (409는 성공으로 처리)
+
+    각 문서는 source_id(Kinesis sequenceNumber 등)와 함께 추가되며,
+    close()는 재처리가 필요한 source_id 집합을 반환합니다.
+    source_id 없이 추가된 문서는 실패해도 집합에 포함되지 않습니다.
+    """
+
+    def __init__(self, deadline: float | None = None,
+                 max_bytes: int = None, max_documents: int = None, scheduler=None):
+        self.deadline = deadline
+        self.scheduler = scheduler or DeadlineScheduler(deadline)
+        self.max_bytes = max_bytes or BULK_MAX_BYTES
+        self.max_documents = max_documents or BULK_MAX_DOCUMENTS
+        self.controller = get_bulk_controller() if BULK_ADAPTIVE and max_documents is None else None
+
+        self.document_count = 0
+        self.success_count = 0
+        self.error_count = 0
+        self.spilled_count = 0
+        self.failed_sources = set()
+
+        self._buffer = bytearray()
+        self._entries = []          # 현재 청크의 (start, end, source_id)
+        self._indices = set()       # 현재 청크에서 새로 등장한 인덱스
+        self._action_lines = {}     # 인덱스별 (_id 없는 action line, _id 앞부분) 캐시
+        self._retry_entries = []    # throttling된 (entry_bytes, source_id)
+        self._in_flight = set()
+
+    def add(self, index_name: str, document: dict, source_id=None, doc_id: str = None):
+        """
+        문서를 직렬화하여 버퍼에 추가하고, 한도에 도달하면 청크를 전송합니다.
+
+        doc_id를 지정하지 않으면 document['event_id']를 _id로 사용하며,
+        둘 다 없으면 OpenSearch가 _id를 생성합니다.
+        """
+        action_lines = self._action_lines.get(index_name)
+        if action_lines is None:
+            # Action line (NDJSON: 각 줄 끝에 newline)
+            action_lines = (
+                json_dumps({"create": {"_index": index_name}}) + b'\n',
+                b'{"create":{"_index":' + json_dumps(index_name) + b',"_id":',
+            )
+            self._action_lines[index_name] = action_lines
+
+        if doc_id is None:
+            doc_id = document.get('event_id')
+        if doc_id:
+            action_line = action_lines[1] + json_dumps(str(doc_id)) + b'}}\n'
         else:
-            success_count = len(documents)
+            action_line = action_lines[0]
 
-        return success_count, error_count
+        document_line = json_dumps(document) + b'\n'
 
-    except (HTTPError, URLError) as e:
-        logger.error(f"OpenSearch bulk request failed: {e}")
-        return 0, len(documents)
+        self.document_count += 1
+        self._append(action_line + document_line, source_id)
+        self._indices.add(index_name)
+
+    def add_entry(self, index_name: str, entry: bytes, source_id=None):
+        """이미 직렬화된 action line + 문서 줄(스필 파일 등)을 버퍼에 추가합니다."""
+        self.document_count += 1
+        self._append(entry, source_id)
+        self._indices.add(index_name)
+
+    def _append(self, entry: bytes, source_id):
+        max_documents = self.controller.documents if self.controller is not None else self.max_documents
+        if self._entries and (len(self._buffer) + len(entry) > self.max_bytes
+                              or len(self._entries) >= max_documents):
+            self.flush()
+
+        start = len(self._buffer)
+        self._buffer += entry
+        self._entries.append((start, len(self._buffer), source_id))
+
+    def flush(self):
+        """버퍼에 쌓인 청크를 전송합니다. 버퍼는 비워서 재사용합니다."""
+        if not self._entries:
+            return
+
+        body = bytes(self._buffer)
+        entries = self._entries
+        indices = self._indices
+
+        self._buffer.clear()
+        self._entries = []
+        self._indices = set()
+
+        if not OPENSEARCH_ENDPOINT:
+            return
+
+        # 마감 전에 응답을 받을 수 없으면 전송하지 않고 Kinesis 재처리에 맡김
+        if not self.scheduler.has_time_for_bulk():
+            logger.warning(f"Not enough time left to send {len(entries)} documents")
+            self._collect(([], [source_id for _, _, source_id in entries], 0, 0, None))
+            return
+
+        # OpenSearch 장애로 브레이커가 열려 있으면 타임아웃을 기다리지 않고 스필
+        # 스필 저장소가 없으면 그대로 전송 - 즉시 실패시키면 cooldown 동안 Kinesis 재시도
+        # (maximum_retry_attempts)를 모두 소진하고 배치가 DLQ로 넘어가므로 타임아웃까지 기다림
+        if get_spill_sink() is not None and not get_circuit_breaker().allow_request():
+            self._spill(body, entries)
+            return
+
+        # 인덱스 템플릿 확인 (실패 시 인덱스 존재 확인 및 생성)
+        ensure_indices_exist(indices)
+
+        concurrency = self.controller.concurrency if self.controller is not None else BULK_CONCURRENCY
+        if concurrency <= 1:
+            self._drain()
+            self._collect(self._send(body, entries, 1))
+            return
+
+        while len(self._in_flight) >= concurrency:
+            done, self._in_flight = wait(self._in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._collect(future.result())
+
+        in_flight = len(self._in_flight) + 1
+        self._in_flight.add(get_bulk_executor().submit(self._send, body, entries, in_flight))
+
+    def _send(self, body: bytes, entries: list, in_flight: int = 1) -> tuple:
+        """청크를 남은 시간 안의 타임아웃으로 전송하고 소요 시간을 기록합니다."""
+        started_at = time.monotonic()
+        result = _send_bulk_request(body, entries, timeout=self.scheduler.request_timeout())
+        self.scheduler.observe_bulk(time.monotonic() - started_at)
+
+        retry_entries, failed_sources, _, _, took_ms = result
+        if self.controller is not None:
+            self.controller.observe(
+                None if failed_sources else took_ms, throttled=bool(retry_entries),
+                documents=len(entries), in_flight=in_flight,
+            )
+
+        # 응답을 받지 못한 요청(연결 실패, 타임아웃, 5xx)만 브레이커 실패로 집계
+        if took_ms is None and failed_sources:
+            get_circuit_breaker().record_failure()
+        else:
+            get_circuit_breaker().record_success()
+        return result
+
+    def _spill(self, body: bytes, entries: list):
+        """청크를 스필 저장소에 저장합니다. 저장하지 못하면 재처리 대상으로 반환합니다."""
+        sink = get_spill_sink()
+        sources = [source_id for _, _, source_id in entries]
+        try:
+            location = sink.write(gzip.compress(body, compresslevel=6))
+        except Exception as e:
+            logger.error(f"Failed to spill {len(entries)} documents: {e}")
+            self._collect(([], sources, 0, 0, None))
+            return
+
+        self.spilled_count += len(entries)
+        logger.warning(f"Circuit open, spilled {len(entries)} documents to {location}")
+
+    def _drain(self):
+        """전송 중인 모든 청크의 결과를 수집합니다."""
+        for future in self._in_flight:
+            self._collect(future.result())
+        self._in_flight = set()
+
+    def _collect(self, chunk_result: tuple):
+        retry_entries, failed_sources, success_count, error_count, _ = chunk_result
+        self._retry_entries.extend(retry_entries)
+        # source_id 없이 추가된 문서(요약 문서 등)는 재처리할 원본이 없으므로 실패 건수만 집계
+        self.failed_sources.update(source_id for source_id in failed_sources if source_id is not None)
+        self.success_count += success_count
+        self.error_count += error_count + len(failed_sources)
+
+    def close(self) -> tuple:
+        """
+        남은 청크를 전송하고 throttling된 문서를 재시도한 뒤 결과를 반환합니다.
+
+        Returns:
+            (success_count, error_count, failed_sources)
+            failed_sources는 재처리가 필요한 문서의 source_id 집합입니다.
+            영구 오류는 재처리해도 동일하게 실패하므로 포함하지 않습니다.
+        """
+        if self.document_count and not OPENSEARCH_ENDPOINT:
+            logger.warning("OPENSEARCH_ENDPOINT not set, skipping bulk indexing")
+
+        self.flush()
+        self._drain()
+
+        attempt = 0
+        while self._retry_entries:
+            if attempt >= BULK_MAX_RETRIES:
+                logger.error(f"Bulk retries exhausted: {len(self._retry_entries)} documents throttled")
+                break
+
+            # Full jitter 지수 백오프
+            delay = random.uniform(0, min(BULK_RETRY_MAX_DELAY_MS, BULK_RETRY_BASE_DELAY_MS * (2 ** attempt))) / 1000
+
+            # 재시도 요청이 마감 시각 안에 끝날 수 없으면 중단하고 Kinesis 재처리에 맡김
+            if not self.scheduler.has_time_for_bulk(delay):
+                logger.warning(f"Not enough time left to retry {len(self._retry_entries)} throttled documents")
+                break
+
+            attempt += 1
+            logger.warning(
+                f"Retrying {len(self._retry_entries)} throttled documents "
+                f"(attempt {attempt}/{BULK_MAX_RETRIES}, delay {delay:.3f}s)"
+            )
+            time.sleep(delay)
+
+            pending = self._retry_entries
+            self._retry_entries = []
+            for entry, source_id in pending:
+                self._append(entry, source_id)
+            self.flush()
+            self._drain()
+
+        for _, source_id in self._retry_entries:
+            self.error_count += 1
+            if source_id is not None:
+                self.failed_sources.add(source_id)
+        self._retry_entries = []
+
+        return self.success_count, self.error_count, self.failed_sources
+
+
+def _send_bulk_request(bulk_body: bytes, entries: list,
+                       timeout: float = BULK_REQUEST_TIMEOUT_SECONDS) -> tuple:
+    """
+    직렬화된 Bulk 청크 하나를 전송하고 item 단위 결과를 분류합니다.
+
+    Args:
+        bulk_body: NDJSON 본문
+        entries: 본문 내 각 문서의 (start, end, source_id)
+        timeout: 요청 타임아웃(초)
+
+    Returns:
+        (retry_entries, failed_sources, success_count, permanent_error_count, took_ms)
+        retry_entries는 429/503으로 거절되어 즉시 재시도할 (entry_bytes, source_id) 목록,
+        failed_sources는 요청 자체가 실패하여 Kinesis 재처리에 맡길 source_id 목록,
+        took_ms는 응답의 took 값입니다 (응답을 받지 못하면 None).
+    """
+    all_sources = [source_id for _, _, source_id in entries]
+
+    # OpenSearch Bulk API 호출
+    try:
+        status, raw_body = opensearch_request(
+            'POST', '/_bulk', body=bulk_body,
+            content_type='application/x-ndjson', timeout=timeout
+        )
     except Exception as e:
+        logger.error(f"OpenSearch bulk request failed: {e}")
+        return [], all_sources, 0, 0, None
+
+    # 요청 전체가 throttling된 경우 전체 재시도
+    if status in RETRYABLE_STATUS_CODES:
+        logger.warning(f"OpenSearch bulk request throttled: HTTP {status}")
+        return [(bulk_body[start:end], source_id) for start, end, source_id in entries], [], 0, 0, None
+    if status >= 300:
+        logger.error(f"OpenSearch bulk request failed: HTTP {status} {raw_body[:500]}")
+        return [], all_sources, 0, 0, None
+
+    try:
+        response_body = json_loads(raw_body)
+    except ValueError as e:
         logger.error(f"Unexpected error during bulk indexing: {e}")
-        return 0, len(documents)
+        return [], all_sources, 0, 0, None
+
+    took_ms = response_body.get('took')
+    if not response_body.get('errors', False):
+        return [], [], len(entries), 0, took_ms
+
+    # 결과 분석 (items는 요청 순서와 동일)
+    retry_entries = []
+    success_count = 0
+    error_count = 0
+
+    items = response_body.get('items', [])
+    for (start, end, source_id), item in zip(entries, items):
+        index_result = next(iter(item.values()), {})
+        status = index_result.get('status', 0)
+        if status == 409:
+            # 같은 _id 문서가 이미 저장됨 (재처리/재시도로 다시 전송된 경우)
+            success_count += 1
+        elif status in RETRYABLE_STATUS_CODES:
+            retry_entries.append((bulk_body[start:end], source_id))
+        elif status >= 400:
+            error_count += 1
+            logger.error(f"Index error: {index_result}")
+        else:
+            success_count += 1
+
+    # 응답 item 수가 요청과 다르면 누락분은 Kinesis 재처리 대상으로 간주
+    failed_sources = all_sources[len(items):]
+
+    return retry_entries, failed_sources, success_count, error_count, took_ms
+
+
+# 필드 별칭 테이블 (초기화 시 한 번 변환)
+FIELD_TRANSFORMS = {
+    'log_level': _to_log_level,
+    'status_code': _to_status_code,
+}
+_default_field_aliases = compile_field_aliases(FIELD_ALIASES)
+_field_alias_tables = _load_field_alias_tables(FIELD_ALIAS_OVERRIDES)
+
+# 텍스트 로그 포맷 {이름: (패턴, {필드: 타입 변환 함수})} - 그룹명이 곧 문서 필드명
+_TEXT_LEVELS = r'(?P<log_level>TRACE|DEBUG|INFO|NOTICE|WARN|WARNING|ERROR|FATAL|CRITICAL|SEVERE)'
+TEXT_LOG_FORMATS = {
+    # 2025-01-15 10:23:45.123  INFO 1 --- [(app)] [nio-8080-exec-1] c.c.o.OrderController : message
+    'spring_boot': (re.compile(
+        r'(?P<log_timestamp>\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}[.,]\d{3}\S*)\s+' + _TEXT_LEVELS
+        + r'\s+\d+\s+---\s+(?:\[[^\]]*\]\s+)?\[\s*(?P<thread>[^\]]*)\]\s+(?P<logger>\S+)\s*:\s(?P<parsed_message>.*)',
+        re.DOTALL,
+    ), {}),
+    # 10:23:45.123 [main] INFO  c.c.o.OrderService - message (logback 기본 패턴, 날짜 선택)
+    'logback': (re.compile(
+        r'(?P<log_timestamp>(?:\d{4}-\d{2}-\d{2}[ T])?\d{2}:\d{2}:\d{2}[.,]\d{3})\s+\[(?P<thread>[^\]]*)\]\s+'
+        + _TEXT_LEVELS + r'\s+(?P<logger>\S+)\s+-\s(?P<parsed_message>.*)',
+        re.DOTALL,
+    ), {}),
+    # 10.0.0.1 - - [15/Jan/2025:10:23:45 +0900] "GET /path HTTP/1.1" 200 512 "-" "curl/8.0" 0.035
+    'nginx': (re.compile(
+        r'(?P<client_ip>\S+) \S+ \S+ \[(?P<log_timestamp>[^\]]+)\] "(?P<http_method>[A-Z]+) (?P<http_path>\S+)[^"]*" '
+        r'(?P<status_code>\d{3}) (?:(?P<bytes_sent>\d+)|-) "[^"]*" "(?P<user_agent>[^"]*)"(?: (?P<duration_ms>\d+(?:\.\d+)?))?'
+    ), {'status_code': int, 'bytes_sent': int, 'duration_ms': _seconds_to_ms}),
+    # https 2025-01-15T10:23:45.123456Z app/lb/id 10.0.0.1:5678 10.0.1.2:8080 0.000 0.035 0.000 200 200 34 366 "GET ..."
+    'alb': (re.compile(
+        r'\S+ (?P<log_timestamp>\d{4}-\d{2}-\d{2}T\S+Z) \S+ (?P<client_ip>[^\s:]+):\d+ \S+ '
+        r'-?[\d.]+ (?:(?P<duration_ms>[\d.]+)|-1) -?[\d.]+ (?P<status_code>\d{3}) (?:(?P<target_status_code>\d{3})|-) '
+        r'\d+ (?P<bytes_sent>\d+) "(?P<http_method>[A-Z-]+) (?P<http_path>\S+)'
+    ), {'status_code': int, 'target_status_code': int, 'bytes_sent': int, 'duration_ms': _seconds_to_ms}),
+    # REPORT RequestId: ...\tDuration: 12.34 ms\tBilled Duration: 13 ms\tMemory Size: 128 MB\tMax Memory Used: 70 MB
+    'lambda_report': (re.compile(
+        r'REPORT RequestId: (?P<request_id>\S+)\s+Duration: (?P<duration_ms>[\d.]+) ms\s+'
+        r'Billed Duration: (?P<billed_duration_ms>\d+) ms\s+Memory Size: (?P<memory_size_mb>\d+) MB\s+'
+        r'Max Memory Used: (?P<max_memory_used_mb>\d+) MB(?:\s+Init Duration: (?P<init_duration_ms>[\d.]+) ms)?'
+    ), {'duration_ms': float, 'billed_duration_ms': int, 'memory_size_mb': int,
+        'max_memory_used_mb': int, 'init_duration_ms': float}),
+}
+
+# 서비스/레벨별 샘플링 임계값 (초기화 시 한 번 계산)
+_sampling_thresholds = _load_sampling_rates(SAMPLING_RATES)
+
+# 서비스별 수집 한도 {service: (rate, burst)} (초기화 시 한 번 계산)
+_ingest_quotas = _load_ingest_quotas(INGEST_QUOTAS)
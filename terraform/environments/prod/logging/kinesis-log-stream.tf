@@ -52,6 +52,10 @@ data "archive_file" "log_router" {
   type        = "zip"
   source_dir  = "${path.module}/../../../../lambda/log-router"
   output_path = "${path.module}/log-router.zip"
+
+  # 로컬 실행으로 생긴 바이트코드가 패키지와 source_code_hash에 섞이지 않도록 제외
+  # (벤치마크/재처리 도구는 tools/log-router에 있으며 패키지에 포함되지 않음)
+  excludes = ["__pycache__", "__pycache__/**"]
 }
 
 resource "aws_lambda_function" "log_router" {
@@ -199,6 +203,9 @@ resource "aws_lambda_event_source_mapping" "kinesis_to_log_router" {
   maximum_batching_window_in_seconds = 5
   parallelization_factor             = 2
 
+  # 부분 실패 보고: 실패한 레코드의 sequenceNumber부터만 재시도
+  function_response_types = ["ReportBatchItemFailures"]
+
   # 실패 시 재시도 설정
   maximum_retry_attempts        = 3
   maximum_record_age_in_seconds = 3600 # 1시간
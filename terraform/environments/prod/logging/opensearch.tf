@@ -356,6 +356,87 @@ resource "opensearch_index_template" "logs" {
         number_of_shards   = 1
         number_of_replicas = 0
       }
+      mappings = {
+        properties = {
+          # 텍스트 포맷마다 형식이 달라 날짜 자동 감지 시 다른 형식 라인이 400으로 유실됨
+          log_timestamp = { type = "keyword" }
+        }
+      }
+    }
+  })
+}
+
+# ============================================================================
+# Log Rollups - rollup-logs-* 인덱스 (log-router 분 단위 집계)
+# ============================================================================
+#
+# log-router가 (서비스, 레벨, 예외 클래스, 분) 단위 건수를 upsert합니다.
+# logs-* 패턴 밖에 두어 로그 라인을 세는 모니터/대시보드에 섞이지 않게 합니다.
+# - 문서 수가 적으므로 추세 분석용으로 90일 보관
+# - count는 스크립트로 누적되므로 long으로 고정 매핑
+# ============================================================================
+
+resource "opensearch_ism_policy" "log_rollups_lifecycle" {
+  policy_id = "rollup-logs-lifecycle-policy"
+
+  body = jsonencode({
+    policy = {
+      policy_id     = "rollup-logs-lifecycle-policy"
+      description   = "rollup-logs-* 인덱스 90일 후 자동 삭제"
+      default_state = "hot"
+      states = [
+        {
+          name    = "hot"
+          actions = []
+          transitions = [
+            {
+              state_name = "delete"
+              conditions = {
+                min_index_age = "90d"
+              }
+            }
+          ]
+        },
+        {
+          name = "delete"
+          actions = [
+            {
+              delete = {}
+            }
+          ]
+          transitions = []
+        }
+      ]
+      ism_template = [
+        {
+          index_patterns = ["rollup-logs-*"]
+          priority       = 100
+        }
+      ]
+    }
+  })
+}
+
+resource "opensearch_index_template" "log_rollups" {
+  name = "rollup-logs-template"
+
+  body = jsonencode({
+    index_patterns = ["rollup-logs-*"]
+    priority       = 100
+    template = {
+      settings = {
+        number_of_shards   = 1
+        number_of_replicas = 0
+      }
+      mappings = {
+        properties = {
+          "@timestamp"    = { type = "date" }
+          service         = { type = "keyword" }
+          level           = { type = "keyword" }
+          exception_class = { type = "keyword" }
+          count           = { type = "long" }
+        }
+      }
     }
   })
 }
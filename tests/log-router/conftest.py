@@ -0,0 +1,129 @@
+"""
+log-router 테스트 공통 설정
+
+lambda_function은 import 시점에 환경 변수를 읽으므로 import 전에 테스트용 값을 설정하고,
+OpenSearch 커넥션 풀은 Bulk 요청을 기록하는 FakeOpenSearch로 교체합니다.
+"""
+
+import base64
+import gzip
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'lambda', 'log-router'))
+
+os.environ.setdefault('OPENSEARCH_ENDPOINT', 'search-test.ap-northeast-2.es.amazonaws.com')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'AKIDEXAMPLE')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'secret')
+os.environ.setdefault('BULK_RETRY_BASE_DELAY_MS', '1')
+
+import lambda_function  # noqa: E402
+
+
+class FakeOpenSearch:
+    """
+    HTTPSConnectionPool 대역 - Bulk 요청의 (action, source) 쌍을 기록하고 모두 성공으로 응답합니다.
+    available이 False이면 연결 실패를 흉내 냅니다.
+
+    - request_statuses: 다음 Bulk 요청들에 순서대로 돌려줄 요청 전체의 HTTP 상태 (예: [503])
+    - item_statuses: {raw_message: [상태, ...]} - 해당 문서가 전송될 때마다 순서대로 돌려줄
+      item 상태 (목록이 비면 201), 실패한 item은 bulk_items에 기록하지 않음
+    """
+
+    def __init__(self):
+        self.host = lambda_function.OPENSEARCH_ENDPOINT
+        self.available = True
+        self.bulk_items = []
+        self.bulk_bodies = []
+        self.request_count = 0
+        self.request_statuses = []
+        self.item_statuses = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, path, body=None, headers=None, timeout=30):
+        with self._lock:
+            self.request_count += 1
+        if not self.available:
+            raise ConnectionError('connection refused')
+        if path != '/_bulk':
+            return 200, b'{}'
+
+        with self._lock:
+            self.bulk_bodies.append(body)
+            if self.request_statuses:
+                return self.request_statuses.pop(0), b'{"error":"unavailable"}'
+
+        lines = body.decode('utf-8').splitlines()
+        items = []
+        for action_line, source_line in zip(lines[::2], lines[1::2]):
+            action, source = json.loads(action_line), json.loads(source_line)
+            with self._lock:
+                statuses = self.item_statuses.get(source.get('raw_message'))
+                status = statuses.pop(0) if statuses else 201
+                if status < 300:
+                    self.bulk_items.append((action, source))
+            items.append({next(iter(action)): {'status': status}})
+        errors = any(next(iter(item.values()))['status'] >= 300 for item in items)
+        return 200, json.dumps({'took': 5, 'errors': errors, 'items': items}).encode('utf-8')
+
+    def items(self, op: str) -> list:
+        return [(action[op], source) for action, source in self.bulk_items if op in action]
+
+
+class FakeContext:
+    def __init__(self, remaining_ms: int = 60000):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+def make_event(messages: list, log_group: str = '/aws/ecs/api-server-prod/app',
+               timestamp: int = 1736904225000) -> dict:
+    """
+    Kinesis 이벤트(CloudWatch Logs 구독 페이로드)를 만듭니다.
+    messages의 항목마다 레코드 하나를 만들며, 항목이 리스트이면 한 레코드에 여러 로그 이벤트를 담습니다.
+    """
+    records = []
+    for position, record_messages in enumerate(messages):
+        if isinstance(record_messages, str):
+            record_messages = [record_messages]
+        payload = {
+            'messageType': 'DATA_MESSAGE',
+            'logGroup': log_group,
+            'logStream': 'ecs/app/task-1',
+            'logEvents': [
+                {'id': f'{position:010d}{offset:010d}', 'timestamp': timestamp + offset, 'message': message}
+                for offset, message in enumerate(record_messages)
+            ],
+        }
+        records.append({
+            'eventID': f'shardId-000000000000:{position}',
+            'kinesis': {
+                'sequenceNumber': str(1000 + position),
+                'data': base64.b64encode(gzip.compress(json.dumps(payload).encode('utf-8'))).decode('ascii'),
+            },
+        })
+    return {'Records': records}
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(monkeypatch):
+    """웜 인보케이션 간 유지되는 모듈 상태를 테스트마다 초기화합니다."""
+    monkeypatch.setattr(lambda_function, '_circuit_breaker', None)
+    monkeypatch.setattr(lambda_function, '_bulk_controller', None)
+    monkeypatch.setattr(lambda_function, '_spill_sink', None)
+    monkeypatch.setattr(lambda_function, '_index_template_ready', True)
+    monkeypatch.setattr(lambda_function, '_token_buckets', {})
+    monkeypatch.setattr(lambda_function, '_quota_drops', {})
+
+
+@pytest.fixture
+def opensearch(monkeypatch):
+    fake = FakeOpenSearch()
+    monkeypatch.setattr(lambda_function, '_connection_pool', fake)
+    return fake
@@ -0,0 +1,72 @@
+"""적응형 Bulk 청크/동시성 제어(AdaptiveBulkController) 테스트"""
+
+import lambda_function
+from conftest import FakeContext, make_event
+
+
+def make_controller(documents: int = 1000, concurrency: int = 2) -> lambda_function.AdaptiveBulkController:
+    return lambda_function.AdaptiveBulkController(
+        documents, concurrency, min_documents=100, max_documents=5000, max_concurrency=4,
+    )
+
+
+def test_full_fast_chunks_grow_chunk_size():
+    controller = make_controller()
+
+    controller.observe(50, throttled=False, documents=1000, in_flight=1)
+
+    assert controller.documents == 1000 + lambda_function.BULK_DOCUMENTS_STEP
+
+
+def test_small_fast_chunks_do_not_grow_limits():
+    controller = make_controller()
+
+    for _ in range(100):
+        controller.observe(5, throttled=False, documents=1, in_flight=1)
+
+    assert controller.documents == 1000
+    assert controller.concurrency == 2
+
+
+def test_concurrency_grows_only_when_saturated():
+    controller = make_controller()
+
+    for _ in range(controller.GROWTH_STREAK):
+        controller.observe(50, throttled=False, documents=1000, in_flight=1)
+    assert controller.concurrency == 2
+
+    for _ in range(controller.GROWTH_STREAK):
+        controller.observe(50, throttled=False, documents=10, in_flight=2)
+    assert controller.concurrency == 3
+
+
+def test_slow_response_shrinks_chunk_size():
+    controller = make_controller()
+
+    controller.observe(lambda_function.BULK_TARGET_TOOK_MS + 1, throttled=False, documents=1000, in_flight=2)
+
+    assert controller.documents == int(1000 * controller.DECREASE_FACTOR_SLOW)
+    assert controller.concurrency == 2
+
+
+def test_throttling_or_failure_halves_chunk_size_and_concurrency():
+    controller = make_controller(documents=1000, concurrency=4)
+
+    controller.observe(50, throttled=True, documents=1000, in_flight=4)
+    assert (controller.documents, controller.concurrency) == (500, 2)
+
+    controller.observe(None, throttled=False, documents=500, in_flight=2)
+    assert (controller.documents, controller.concurrency) == (250, 1)
+
+    for _ in range(10):
+        controller.observe(None, throttled=False)
+    assert (controller.documents, controller.concurrency) == (100, 1)
+
+
+def test_idle_invocations_do_not_ramp_up_controller(opensearch):
+    for _ in range(30):
+        lambda_function.handler(make_event(['INFO ok']), FakeContext())
+
+    controller = lambda_function.get_bulk_controller()
+    assert controller.documents == lambda_function.BULK_MAX_DOCUMENTS
+    assert controller.concurrency == lambda_function.BULK_CONCURRENCY
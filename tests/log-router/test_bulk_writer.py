@@ -0,0 +1,75 @@
+"""Bulk 전송 재시도/오류 분류(BulkWriter, _send_bulk_request) 테스트"""
+
+import pytest
+
+import lambda_function
+from conftest import FakeContext, make_event
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # 백오프 대기 시간만 기록하고 실제로 기다리지 않음
+    delays = []
+    monkeypatch.setattr(lambda_function.time, 'sleep', delays.append)
+    monkeypatch.setattr(lambda_function, 'ROLLUP_ENABLED', False)
+    return delays
+
+
+def test_throttled_items_are_retried_with_backoff(opensearch, sleeps):
+    opensearch.item_statuses = {'INFO busy': [429, 429]}
+
+    result = lambda_function.handler(make_event(['INFO busy', 'INFO ok']), FakeContext())
+
+    assert result['documentsIndexed'] == 2
+    assert result['batchItemFailures'] == []
+    # 재시도 요청에는 거절된 문서만 포함되고, 대기 시간은 지수적으로 늘어나는 상한 안에서 결정
+    assert len(opensearch.bulk_bodies) == 3
+    assert all(b'INFO ok' not in body and b'INFO busy' in body for body in opensearch.bulk_bodies[1:])
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= lambda_function.BULK_RETRY_BASE_DELAY_MS / 1000
+    assert 0 <= sleeps[1] <= lambda_function.BULK_RETRY_BASE_DELAY_MS * 2 / 1000
+
+
+def test_exhausted_item_retries_fail_the_source_record(opensearch, sleeps):
+    opensearch.item_statuses = {'INFO busy': [429] * (lambda_function.BULK_MAX_RETRIES + 1)}
+
+    result = lambda_function.handler(make_event(['INFO ok', 'INFO busy']), FakeContext())
+
+    assert result['documentsIndexed'] == 1
+    assert len(sleeps) == lambda_function.BULK_MAX_RETRIES
+    assert result['batchItemFailures'] == [{'itemIdentifier': '1001'}]
+
+
+def test_mapping_errors_fail_immediately_without_retry(opensearch, sleeps):
+    opensearch.item_statuses = {'ERROR bad': [400]}
+
+    result = lambda_function.handler(make_event(['ERROR bad', 'INFO ok']), FakeContext())
+
+    # 재처리해도 같은 오류가 나므로 재시도/Kinesis 재처리 없이 오류로만 집계
+    assert result['documentsIndexed'] == 1
+    assert result['documentErrors'] == 1
+    assert result['batchItemFailures'] == []
+    assert len(opensearch.bulk_bodies) == 1
+    assert sleeps == []
+
+
+def test_throttled_bulk_request_is_retried_as_a_whole(opensearch, sleeps):
+    opensearch.request_statuses = [503]
+
+    result = lambda_function.handler(make_event(['INFO a', 'INFO b']), FakeContext())
+
+    assert result['documentsIndexed'] == 2
+    assert result['batchItemFailures'] == []
+    assert len(opensearch.bulk_bodies) == 2
+    assert opensearch.bulk_bodies[0] == opensearch.bulk_bodies[1]
+    assert len(sleeps) == 1
+
+
+def test_failed_bulk_request_fails_all_source_records(opensearch, sleeps):
+    opensearch.request_statuses = [500]
+
+    result = lambda_function.handler(make_event(['INFO a', 'INFO b']), FakeContext())
+
+    assert result['documentsIndexed'] == 0
+    assert result['batchItemFailures'] == [{'itemIdentifier': '1000'}, {'itemIdentifier': '1001'}]
+    assert sleeps == []
@@ -0,0 +1,189 @@
+"""서킷 브레이커와 스필 저장소 테스트"""
+
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+import lambda_function
+from conftest import FakeContext, make_event
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'tools', 'log-router'))
+
+import replay  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_replay_state(monkeypatch):
+    # replay.main()이 설정하는 환경 변수와 버킷별 클라이언트를 테스트 후 되돌림
+    monkeypatch.setenv('SPILL_TARGET', '')
+    monkeypatch.setenv('BULK_MAX_CONCURRENCY', str(lambda_function.BULK_MAX_CONCURRENCY))
+    monkeypatch.setattr(replay, '_s3_clients', {})
+
+
+def open_breaker(breaker: lambda_function.CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def expire_cooldown(breaker: lambda_function.CircuitBreaker):
+    breaker.opened_at -= breaker.cooldown_seconds
+
+
+def read_spill_entries(directory) -> list:
+    entries = []
+    for root, _, names in os.walk(directory):
+        for name in sorted(names):
+            with open(os.path.join(root, name), 'rb') as f:
+                lines = gzip.decompress(f.read()).decode('utf-8').splitlines()
+            entries.extend(zip(map(json.loads, lines[::2]), map(json.loads, lines[1::2])))
+    return entries
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = lambda_function.CircuitBreaker(failure_threshold=3, cooldown_seconds=60)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failure_count():
+    breaker = lambda_function.CircuitBreaker(failure_threshold=3, cooldown_seconds=60)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.allow_request()
+
+
+def test_half_open_allows_single_trial_and_closes_on_success():
+    breaker = lambda_function.CircuitBreaker(failure_threshold=3, cooldown_seconds=60)
+    open_breaker(breaker)
+    expire_cooldown(breaker)
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # 시험 요청이 끝날 때까지 나머지는 차단
+
+    breaker.record_success()
+    assert breaker.allow_request()
+    assert breaker.opened_at is None
+
+
+def test_half_open_trial_failure_reopens():
+    breaker = lambda_function.CircuitBreaker(failure_threshold=3, cooldown_seconds=60)
+    open_breaker(breaker)
+    expire_cooldown(breaker)
+
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    assert not breaker.allow_request()
+    expire_cooldown(breaker)
+    assert breaker.allow_request()
+
+
+def test_local_spill_sink_writes_gzip_file(tmp_path):
+    sink = lambda_function.LocalSpillSink(str(tmp_path))
+    body = b'{"create":{"_index":"logs-2025-01-15","_id":"a"}}\n{"message":"hello"}\n'
+
+    location = sink.write(gzip.compress(body))
+
+    assert location.startswith(str(tmp_path)) and location.endswith('.ndjson.gz')
+    with open(location, 'rb') as f:
+        assert gzip.decompress(f.read()) == body
+    assert not [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith('.tmp')]
+
+
+def test_handler_spills_when_breaker_is_open(opensearch, monkeypatch, tmp_path):
+    monkeypatch.setattr(lambda_function, '_spill_sink', lambda_function.LocalSpillSink(str(tmp_path)))
+    open_breaker(lambda_function.get_circuit_breaker())
+
+    result = lambda_function.handler(make_event(['ERROR boom', 'INFO ok']), FakeContext())
+
+    assert result['documentsSpilled'] == 2
+    assert result['documentsIndexed'] == 0
+    assert result['batchItemFailures'] == []
+    assert opensearch.request_count == 0
+
+    operations = sorted(next(iter(action)) for action, _ in read_spill_entries(tmp_path))
+    assert operations == ['create', 'create', 'update', 'update']
+
+
+def test_open_breaker_without_spill_target_still_sends(opensearch):
+    # 스필 저장소가 없으면 cooldown 동안 즉시 실패시켜 Kinesis 재시도를 소진하지 않음
+    open_breaker(lambda_function.get_circuit_breaker())
+
+    result = lambda_function.handler(make_event(['ERROR boom', 'INFO ok']), FakeContext())
+
+    assert result['documentsIndexed'] == 2
+    assert result['batchItemFailures'] == []
+    assert opensearch.request_count > 0
+    assert lambda_function.get_circuit_breaker().opened_at is None
+
+
+def test_open_breaker_without_spill_target_waits_for_opensearch_failure(opensearch):
+    breaker = lambda_function.get_circuit_breaker()
+    open_breaker(breaker)
+    opensearch.available = False
+
+    result = lambda_function.handler(make_event(['ERROR boom']), FakeContext())
+
+    # 실패는 실제 요청 결과이며 브레이커 차단으로 인한 즉시 실패가 아님
+    assert opensearch.request_count > 0
+    assert result['batchItemFailures'] == [{'itemIdentifier': '1000'}]
+
+
+def test_spilled_documents_replay_into_opensearch(opensearch, monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(lambda_function, '_spill_sink', lambda_function.LocalSpillSink(str(tmp_path)))
+    open_breaker(lambda_function.get_circuit_breaker())
+    lambda_function.handler(make_event(['ERROR boom', 'INFO ok']), FakeContext())
+    spilled = read_spill_entries(tmp_path)
+
+    # 장애 복구 후 재처리
+    monkeypatch.setattr(lambda_function, '_circuit_breaker', None)
+    monkeypatch.setattr(lambda_function, '_spill_sink', None)
+    assert replay.main(['spill', str(tmp_path)]) == 0
+
+    assert sorted(map(json.dumps, opensearch.bulk_items)) == sorted(map(json.dumps, spilled))
+    assert 'indexed: 4' in capsys.readouterr().out
+
+
+def test_spill_replay_rerun_only_sends_failed_entries(opensearch, monkeypatch, tmp_path, capsys):
+    spill_dir, retry_dir = tmp_path / 'spill', tmp_path / 'retry'
+    monkeypatch.setattr(lambda_function, '_spill_sink', lambda_function.LocalSpillSink(str(spill_dir)))
+    open_breaker(lambda_function.get_circuit_breaker())
+    lambda_function.handler(make_event(['ERROR boom', 'INFO ok']), FakeContext())
+    spilled = read_spill_entries(spill_dir)
+    assert any('update' in action for action, _ in spilled)
+
+    monkeypatch.setattr(lambda_function, '_circuit_breaker', None)
+    monkeypatch.setattr(lambda_function, '_spill_sink', None)
+    monkeypatch.setattr(lambda_function, 'BULK_ADAPTIVE', False)
+    monkeypatch.setattr(lambda_function, 'BULK_MAX_DOCUMENTS', 1)
+    send = opensearch.request
+
+    def request_failing_boom(method, path, body=None, headers=None, timeout=30):
+        if body is not None and b'"create"' in body and b'ERROR boom' in body:
+            raise ConnectionError('connection reset')
+        return send(method, path, body=body, headers=headers, timeout=timeout)
+
+    monkeypatch.setattr(opensearch, 'request', request_failing_boom)
+    assert replay.main(['spill', str(spill_dir), '--retry-dir', str(retry_dir)]) == 1
+    retry_files = os.listdir(retry_dir)
+    assert len(retry_files) == 1
+    assert f"retry needed: {retry_dir / retry_files[0]}" in capsys.readouterr().out
+
+    # 재실행은 실패한 create 하나만 전송하고, 이미 반영된 롤업 update는 다시 보내지 않음
+    monkeypatch.setattr(opensearch, 'request', send)
+    assert replay.main(['spill', str(retry_dir), '--retry-dir', str(retry_dir)]) == 0
+
+    assert sorted(map(json.dumps, opensearch.bulk_items)) == sorted(map(json.dumps, spilled))
+    assert os.listdir(retry_dir) == []
@@ -0,0 +1,61 @@
+"""마감 시각 기반 처리(DeadlineScheduler) 테스트"""
+
+import time
+
+import pytest
+
+import lambda_function
+from conftest import FakeContext, make_event
+
+
+class FakeClock:
+    """lambda_function.time 대역 - monotonic()은 advance()로만 흐르고 나머지는 time 모듈에 위임합니다."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(lambda_function, 'time', fake_clock)
+    monkeypatch.setattr(lambda_function, 'ROLLUP_ENABLED', False)
+    return fake_clock
+
+
+def test_records_without_time_left_are_deferred(opensearch, clock):
+    result = lambda_function.handler(make_event(['INFO a', 'INFO b']), FakeContext(remaining_ms=1000))
+
+    assert result['deferredRecords'] == 2
+    assert result['batchItemFailures'] == [{'itemIdentifier': '1000'}, {'itemIdentifier': '1001'}]
+    assert opensearch.request_count == 0
+
+
+def test_slow_bulk_requests_defer_remaining_records(opensearch, clock, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'BULK_ADAPTIVE', False)
+    monkeypatch.setattr(lambda_function, 'BULK_CONCURRENCY', 1)
+    monkeypatch.setattr(lambda_function, 'BULK_MAX_DOCUMENTS', 1)
+    send = opensearch.request
+
+    def slow_request(method, path, body=None, headers=None, timeout=30):
+        clock.advance(1.5)
+        return send(method, path, body=body, headers=headers, timeout=timeout)
+
+    monkeypatch.setattr(opensearch, 'request', slow_request)
+    remaining_ms = lambda_function.DEADLINE_SAFETY_MARGIN_MS + 3500
+
+    result = lambda_function.handler(make_event(['INFO a', 'INFO b', 'INFO c']), FakeContext(remaining_ms))
+
+    # 첫 청크 전송에 걸린 시간 때문에 세 번째 레코드는 처리하지 않고 Kinesis 재처리로 넘김
+    assert result['documentsIndexed'] == 2
+    assert result['deferredRecords'] == 1
+    assert result['batchItemFailures'] == [{'itemIdentifier': '1002'}]
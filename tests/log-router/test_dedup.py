@@ -0,0 +1,53 @@
+"""레코드 내 중복 로그 라인 합치기(collapse_duplicates) 테스트"""
+
+import json
+
+import lambda_function
+from conftest import FakeContext, make_event
+
+
+def test_repeated_text_lines_are_collapsed(opensearch, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'DEDUP_ENABLED', True)
+    lines = [f'ERROR Connection refused to db-{i % 2} after {i} retries' for i in range(10)]
+
+    result = lambda_function.handler(make_event([lines]), FakeContext())
+
+    assert result['documentsIndexed'] == 1
+    (_, doc), = opensearch.items('create')
+    assert doc['repeat_count'] == 10
+    assert doc['raw_message'] == lines[0]
+
+
+def test_json_request_lines_are_not_collapsed(opensearch, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'DEDUP_ENABLED', True)
+    lines = [
+        json.dumps({'level': 'INFO', 'message': 'Request completed', 'traceId': f't{i}',
+                    'path': f'/orders/{i}', 'status': 500 if i % 2 else 200})
+        for i in range(6)
+    ]
+
+    result = lambda_function.handler(make_event([lines]), FakeContext())
+
+    assert result['documentsIndexed'] == 6
+    docs = [doc for _, doc in opensearch.items('create')]
+    assert [doc['trace_id'] for doc in docs] == [f't{i}' for i in range(6)]
+    assert all('repeat_count' not in doc for doc in docs)
+
+
+def test_repeated_json_lines_are_collapsed(opensearch, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'DEDUP_ENABLED', True)
+    lines = [
+        json.dumps({'timestamp': f'2025-01-15T10:23:{i:02d}.123Z', 'level': 'WARN',
+                    'logger_name': 'c.c.o.PoolMonitor', 'message': f'Connection pool exhausted, waited {i}ms'})
+        for i in range(5)
+    ]
+    lines.append(json.dumps({'timestamp': '2025-01-15T10:23:59.123Z', 'level': 'WARN',
+                             'logger_name': 'c.c.o.CacheMonitor', 'message': 'Cache miss ratio high'}))
+
+    result = lambda_function.handler(make_event([lines]), FakeContext())
+
+    assert result['documentsIndexed'] == 2
+    first, other = [doc for _, doc in opensearch.items('create')]
+    assert first['repeat_count'] == 5
+    assert first['raw_message'] == lines[0]
+    assert 'repeat_count' not in other
@@ -0,0 +1,47 @@
+"""JSON 필드 별칭 정규화(normalize_fields) 테스트"""
+
+import json
+
+import lambda_function
+
+
+def test_first_truthy_alias_wins_and_transforms_apply():
+    parsed = {'level': '', 'severity': 'warn', 'statusCode': '404', 'status': 200, 'traceId': 'abc'}
+
+    lambda_function.normalize_fields(parsed)
+
+    assert parsed['log_level'] == 'WARN'
+    assert parsed['status_code'] == 404
+    assert parsed['trace_id'] == 'abc'
+
+
+def test_message_moves_to_parsed_message():
+    parsed = {'message': 'hello'}
+
+    lambda_function.normalize_fields(parsed)
+
+    assert parsed == {'parsed_message': 'hello'}
+
+
+def test_service_override_aliases_take_precedence(monkeypatch):
+    tables = lambda_function._load_field_alias_tables(json.dumps({'gateway': {'trace_id': ['x_request_trace']}}))
+    monkeypatch.setattr(lambda_function, '_field_alias_tables', tables)
+
+    gateway = {'x_request_trace': 'override', 'traceId': 'default'}
+    other = {'x_request_trace': 'override', 'traceId': 'default'}
+    lambda_function.normalize_fields(gateway, 'gateway')
+    lambda_function.normalize_fields(other, 'api-server')
+
+    assert gateway['trace_id'] == 'override'
+    assert other['trace_id'] == 'default'
+
+
+def test_override_strings_are_only_used_as_keys(monkeypatch):
+    alias = "x') or __import__('os').getpid() or ('"
+    tables = lambda_function._load_field_alias_tables(json.dumps({'gateway': {'trace_id': [alias]}}))
+    monkeypatch.setattr(lambda_function, '_field_alias_tables', tables)
+
+    parsed = {alias: 'abc'}
+    lambda_function.normalize_fields(parsed, 'gateway')
+
+    assert parsed['trace_id'] == 'abc'
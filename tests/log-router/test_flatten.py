@@ -0,0 +1,41 @@
+"""JSON 평탄화(flatten_json) 한도 테스트"""
+
+import json
+
+import lambda_function
+
+
+def nested(depth: int) -> dict:
+    value = 'leaf'
+    for level in range(depth):
+        value = {f'k{level}': value}
+    return value
+
+
+def test_objects_inside_arrays_go_to_overflow():
+    obj = {'x': [{f'key{i}': nested(5) for i in range(500)}], 'ok': 1}
+
+    flattened = lambda_function.flatten_json(obj, max_depth=2, max_fields=10)
+
+    assert 'x' not in flattened
+    assert flattened['ok'] == 1
+    assert json.loads(flattened[lambda_function.OVERFLOW_FIELD])['x'] == obj['x']
+
+
+def test_nested_arrays_go_to_overflow():
+    flattened = lambda_function.flatten_json({'matrix': [[1, 2], [3, 4]]})
+
+    assert json.loads(flattened[lambda_function.OVERFLOW_FIELD]) == {'matrix': [[1, 2], [3, 4]]}
+
+
+def test_scalar_arrays_are_kept():
+    flattened = lambda_function.flatten_json({'tags': ['a', 'b'], 'ids': [1, 2, 3]})
+
+    assert flattened == {'tags': ['a', 'b'], 'ids': [1, 2, 3]}
+
+
+def test_depth_and_field_limits():
+    flattened = lambda_function.flatten_json({'a': {'b': {'c': 1}}, 'd': 2, 'e': 3}, max_depth=2, max_fields=1)
+
+    assert flattened['d'] == 2
+    assert json.loads(flattened[lambda_function.OVERFLOW_FIELD]) == {'a_b': {'c': 1}, 'e': 3}
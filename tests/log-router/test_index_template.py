@@ -0,0 +1,22 @@
+"""인덱스 템플릿 확인(ensure_index_template) 테스트"""
+
+import lambda_function
+
+
+def test_failed_template_check_is_retried_after_ttl(opensearch, monkeypatch):
+    monkeypatch.setattr(lambda_function, '_index_template_ready', None)
+    opensearch.available = False
+
+    assert lambda_function.ensure_index_template() is False
+    assert lambda_function.ensure_index_template() is False
+    assert opensearch.request_count == 1
+
+    # TTL이 지나면 다시 확인하여 복구된 템플릿을 사용
+    opensearch.available = True
+    monkeypatch.setattr(
+        lambda_function, '_index_template_checked_at',
+        lambda_function._index_template_checked_at - lambda_function.INDEX_CACHE_TTL_SECONDS,
+    )
+    assert lambda_function.ensure_index_template() is True
+    assert lambda_function.ensure_index_template() is True
+    assert opensearch.request_count == 2
@@ -0,0 +1,81 @@
+"""분 단위 집계(rollup) upsert 테스트"""
+
+import lambda_function
+from conftest import FakeContext, make_event
+
+
+def test_rollups_are_counted_separately_from_log_documents(opensearch):
+    event = make_event(['ERROR boom', 'ERROR boom again', 'INFO ok'])
+
+    result = lambda_function.handler(event, FakeContext())
+
+    assert result['documentsIndexed'] == 3
+    assert result['rollupsUpserted'] == 2
+
+    counts = {source['upsert']['level']: source['upsert']['count'] for _, source in opensearch.items('update')}
+    assert counts == {'ERROR': 2, 'INFO': 1}
+
+
+def test_rollup_index_is_outside_log_index_pattern(opensearch):
+    lambda_function.handler(make_event(['ERROR boom']), FakeContext())
+
+    (action, source), = opensearch.items('update')
+    assert action['_index'] == 'rollup-logs-2025-01-15'
+    assert not action['_index'].startswith(f'{lambda_function.INDEX_PREFIX}-')
+    assert source['upsert']['@timestamp'] == '2025-01-15T01:23:00Z'
+
+
+def test_rollup_counts_collapsed_duplicates(opensearch, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'DEDUP_ENABLED', True)
+    # 한 레코드 안에 같은 메시지 50개
+    event = make_event([['ERROR Connection refused to db-1'] * 50])
+
+    result = lambda_function.handler(event, FakeContext())
+
+    assert result['documentsIndexed'] == 1
+    (_, source), = opensearch.items('update')
+    assert source['upsert']['count'] == 50
+    assert source['script']['params']['count'] == 50
+
+
+def test_failed_bulk_with_rollups_only_retries_kinesis_records(opensearch, monkeypatch):
+    monkeypatch.setattr(lambda_function, 'ROLLUP_ENABLED', True)
+    opensearch.available = False
+    event = make_event(['ERROR boom', 'INFO ok'])
+
+    result = lambda_function.handler(event, FakeContext())
+
+    assert result['documentsIndexed'] == 0
+    assert result['rollupsUpserted'] == 0
+    assert result['batchItemFailures'] == [{'itemIdentifier': '1000'}, {'itemIdentifier': '1001'}]
+
+
+def test_rollups_skip_records_that_will_be_replayed(opensearch, monkeypatch):
+    # 두 번째 레코드의 문서가 재시도 가능한 오류로 실패하면 그 이후 레코드는 모두 재처리됨
+    original = opensearch.request
+
+    def request(method, path, body=None, headers=None, timeout=30):
+        if path == '/_bulk' and b'"create"' in body and b'second' in body:
+            raise ConnectionError('connection reset')
+        return original(method, path, body, headers, timeout)
+
+    monkeypatch.setattr(opensearch, 'request', request)
+    monkeypatch.setattr(lambda_function, 'BULK_ADAPTIVE', False)
+    monkeypatch.setattr(lambda_function, 'BULK_MAX_DOCUMENTS', 1)
+    event = make_event(['ERROR first', 'ERROR second', 'ERROR third'])
+
+    result = lambda_function.handler(event, FakeContext())
+
+    assert result['batchItemFailures'] == [{'itemIdentifier': '1001'}]
+    (_, source), = opensearch.items('update')
+    assert source['upsert']['count'] == 1
+
+
+def test_rollups_skip_deferred_records(opensearch):
+    event = make_event(['ERROR first', 'ERROR second'])
+
+    # 남은 시간이 안전 여유보다 짧으면 모든 레코드가 연기됨
+    result = lambda_function.handler(event, FakeContext(remaining_ms=1000))
+
+    assert result['deferredRecords'] == 2
+    assert opensearch.items('update') == []
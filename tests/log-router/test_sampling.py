@@ -0,0 +1,41 @@
+"""서비스/레벨별 샘플링(sample_document) 테스트"""
+
+import json
+
+import pytest
+
+import lambda_function
+
+RATES = {'default': {'INFO': 0.1}, 'gateway': {'INFO': 1}}
+
+
+@pytest.fixture
+def sampling_rates(monkeypatch):
+    thresholds = lambda_function._load_sampling_rates(json.dumps(RATES))
+    monkeypatch.setattr(lambda_function, '_sampling_thresholds', thresholds)
+
+
+def make_doc(service: str, level: str, position: int) -> dict:
+    return {'service': service, 'level': level, 'event_id': f'{position:020d}'}
+
+
+def test_service_override_keeping_all_levels_does_not_fall_back_to_default(sampling_rates):
+    stats = {}
+    kept = sum(lambda_function.sample_document(make_doc('gateway', 'INFO', i), stats) for i in range(1000))
+
+    assert kept == 1000
+
+
+def test_default_rate_applies_to_services_without_override(sampling_rates):
+    stats = {}
+    kept = sum(lambda_function.sample_document(make_doc('api-server', 'INFO', i), stats) for i in range(1000))
+
+    assert 50 < kept < 150
+    assert stats['api-server'] == {'kept': kept, 'dropped': 1000 - kept}
+
+
+def test_always_keep_levels_are_not_sampled(sampling_rates):
+    stats = {}
+    kept = sum(lambda_function.sample_document(make_doc('api-server', 'ERROR', i), stats) for i in range(100))
+
+    assert kept == 100
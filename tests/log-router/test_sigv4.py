@@ -0,0 +1,46 @@
+"""SigV4 signing key 캐시 테스트"""
+
+import threading
+
+import lambda_function
+
+
+def test_signing_key_matches_aws_example(monkeypatch):
+    # AWS SigV4 문서의 예제 값
+    monkeypatch.setattr(lambda_function, '_signing_key_cache', {})
+    signing_key = lambda_function.get_signature_key(
+        'wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY', '20120215', 'us-east-1', 'iam'
+    )
+
+    assert signing_key.hex() == 'f4780e2d9f65fa895f9c67b32ce1baf0b0d8a43505a000a1a9e090d414db404d'
+
+
+def test_signing_key_is_replaced_on_date_rollover(monkeypatch):
+    monkeypatch.setattr(lambda_function, '_signing_key_cache', {})
+    first = lambda_function.get_signature_key('secret', '20250115', 'ap-northeast-2', 'es')
+    second = lambda_function.get_signature_key('secret', '20250116', 'ap-northeast-2', 'es')
+
+    assert first != second
+    assert lambda_function._signing_key_cache == {('ap-northeast-2', 'es'): ('20250116', second)}
+
+
+def test_concurrent_signing_across_date_rollover(monkeypatch):
+    monkeypatch.setattr(lambda_function, '_signing_key_cache', {})
+    errors = []
+
+    def sign(offset: int):
+        try:
+            for i in range(2000):
+                date_stamp = f'2025011{(i + offset) % 2 + 5}'
+                service = ('es', 's3')[i % 2]
+                lambda_function.get_signature_key('secret', date_stamp, 'ap-northeast-2', service)
+        except Exception as e:  # pragma: no cover - 실패 시에만 기록
+            errors.append(e)
+
+    threads = [threading.Thread(target=sign, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
@@ -0,0 +1,31 @@
+"""텍스트 로그 포맷 파싱(parse_text_message) 테스트"""
+
+import lambda_function
+
+
+def test_converters_type_numeric_fields():
+    parsed = lambda_function.parse_text_message(
+        '10.0.0.1 - - [15/Jan/2025:10:23:45 +0900] "GET /health HTTP/1.1" 200 512 "-" "curl/8.0" 0.035',
+        list(lambda_function.TEXT_LOG_FORMATS),
+    )
+
+    assert parsed['log_format'] == 'nginx'
+    assert parsed['status_code'] == 200
+    assert parsed['bytes_sent'] == 512
+    assert parsed['duration_ms'] == 35.0
+
+
+def test_log_timestamp_is_kept_raw_and_mapped_as_keyword():
+    text_formats = list(lambda_function.TEXT_LOG_FORMATS)
+    messages = [
+        '2025-01-15T10:23:45.123+09:00  INFO 1 --- [nio-8080-exec-1] c.c.o.OrderController : created',
+        '10:23:45.123 [main] INFO  c.c.o.OrderService - started',
+        '10.0.0.1 - - [15/Jan/2025:10:23:45 +0900] "GET /health HTTP/1.1" 200 512 "-" "curl/8.0"',
+    ]
+
+    timestamps = [lambda_function.parse_text_message(message, text_formats)['log_timestamp'] for message in messages]
+
+    # 형식이 서로 다른 원문이므로 날짜 자동 감지에 맡기지 않고 keyword로 고정
+    assert timestamps == ['2025-01-15T10:23:45.123+09:00', '10:23:45.123', '15/Jan/2025:10:23:45 +0900']
+    mappings = lambda_function.INDEX_SETTINGS['mappings']['properties']
+    assert mappings['log_timestamp'] == {'type': 'keyword'}
@@ -0,0 +1,121 @@
+"""
+Exception 클래스 추출 벤치마크 및 골든 테스트
+
+기존 구현(정규식 4개를 순서대로 검색)과 단일 스캔 extract_exception_class의
+결과가 동일한지 골든 케이스와 무작위 입력으로 확인하고, 긴 Java 스택 트레이스에서
+처리 시간을 비교합니다.
+
+실행:
+    python tools/log-router/benchmarks/bench_exception.py
+"""
+
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'lambda', 'log-router'))
+
+import lambda_function  # noqa: E402
+
+
+def legacy_extract_exception_class(stack_trace: str) -> str:
+    """기존 구현"""
+    if not stack_trace:
+        return None
+
+    patterns = [
+        r'([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*Exception)',
+        r'([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*Error)',
+        r'([A-Z][a-zA-Z0-9]*Exception)',
+        r'([A-Z][a-zA-Z0-9]*Error)',
+    ]
+
+    for pattern in patterns:
+        match = re.search(pattern, stack_trace)
+        if match:
+            full_class = match.group(1)
+            return full_class.split('.')[-1]
+
+    return None
+
+
+def java_trace(frames: int, head: str, caused_by: str = None) -> str:
+    lines = [head]
+    lines += [f"\tat com.connectly.order.service.OrderService.process{i}(OrderService.java:{100 + i})" for i in range(frames)]
+    if caused_by:
+        lines.append(f"Caused by: {caused_by}")
+        lines += [f"\tat com.zaxxer.hikari.pool.HikariPool.getConnection(HikariPool.java:{200 + i})" for i in range(frames)]
+    return '\n'.join(lines)
+
+
+GOLDEN_CASES = [
+    ("java.lang.IllegalStateException: order already paid", "IllegalStateException"),
+    ("java.lang.OutOfMemoryError: Java heap space", "OutOfMemoryError"),
+    ("java.lang.AssertionError: expected\nCaused by: java.io.IOException: closed", "IOException"),
+    ("MyExceptionHandler failed", "MyException"),
+    ("com.foo.Exception: bare", None),
+    ("Exception", None),
+    ("AExceptionXError", "AException"),
+    ("x.y_Error.z.FooException", "FooException"),
+    ("no exception here", None),
+    ("", None),
+    ("TypeError: undefined is not a function", "TypeError"),
+    ("org.springframework.dao.DataIntegrityViolationException: could not execute statement", "DataIntegrityViolationException"),
+    (java_trace(200, "java.lang.NullPointerException: null"), "NullPointerException"),
+    (java_trace(200, "java.lang.StackOverflowError", "java.sql.SQLTransientConnectionException: timeout"), "SQLTransientConnectionException"),
+]
+
+ALPHABET = 'aEeErxcptionro._ :\n1'
+
+
+def check_golden():
+    for stack_trace, expected in GOLDEN_CASES:
+        legacy = legacy_extract_exception_class(stack_trace)
+        current = lambda_function.extract_exception_class(stack_trace, max_lines=0)
+        assert legacy == expected, (stack_trace[:80], legacy, expected)
+        assert current == expected, (stack_trace[:80], current, expected)
+
+    rng = random.Random(42)
+    tokens = ['Exception', 'Error', '.', '..', 'Foo', 'java.lang.', ' ', '\n', '_', 'x', '1', 'a.1', 'E', 'rror']
+    for _ in range(50000):
+        if rng.random() < 0.5:
+            text = ''.join(rng.choice(tokens) for _ in range(rng.randint(0, 12)))
+        else:
+            text = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40)))
+        legacy = legacy_extract_exception_class(text)
+        current = lambda_function.extract_exception_class(text, max_lines=0)
+        assert legacy == current, (text, legacy, current)
+
+        # 줄 수 제한은 앞쪽 max_lines 줄만 잘라 전체 검사한 결과와 같아야 함
+        max_lines = rng.randint(1, 4)
+        truncated = '\n'.join(text.split('\n')[:max_lines])
+        limited = lambda_function.extract_exception_class(text, max_lines=max_lines)
+        assert limited == legacy_extract_exception_class(truncated), (text, max_lines, limited)
+
+    print(f"golden: {len(GOLDEN_CASES)} cases + 50000 random inputs identical")
+
+
+def main():
+    check_golden()
+
+    traces = {
+        'exception first line': java_trace(100, "java.lang.IllegalArgumentException: bad request"),
+        'error + caused by': java_trace(100, "java.lang.StackOverflowError", "java.net.SocketTimeoutException: Read timed out"),
+        'error only': java_trace(100, "java.lang.OutOfMemoryError: Metaspace"),
+    }
+
+    number = 200
+    for name, trace in traces.items():
+        legacy = min(timeit.repeat(lambda: legacy_extract_exception_class(trace), number=number, repeat=5))
+        current = min(timeit.repeat(lambda: lambda_function.extract_exception_class(trace, max_lines=0), number=number, repeat=5))
+        limited = min(timeit.repeat(lambda: lambda_function.extract_exception_class(trace, max_lines=50), number=number, repeat=5))
+        print(
+            f"{name:>22} ({len(trace):,} chars): legacy {legacy / number * 1e6:8.1f} us, "
+            f"single-pass {current / number * 1e6:8.1f} us, first 50 lines {limited / number * 1e6:8.1f} us"
+        )
+
+
+if __name__ == '__main__':
+    main()
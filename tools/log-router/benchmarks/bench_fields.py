@@ -0,0 +1,197 @@
+"""
+JSON 필드 정규화/평탄화 벤치마크
+
+기존 if-chain 방식의 parse_log_message와 별칭 테이블 기반 정규화,
+기존 재귀 flatten_json과 한도가 있는 반복형 flatten_json의
+문서당 처리 비용을 비교하고, 두 구현의 결과가 동일한지 확인합니다.
+
+실행:
+    python tools/log-router/benchmarks/bench_fields.py
+"""
+
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'lambda', 'log-router'))
+
+import lambda_function  # noqa: E402
+from bench_json import SAMPLE_LINES  # noqa: E402
+
+ALIAS_KEYS = sorted({alias for aliases in lambda_function.FIELD_ALIASES.values() for alias in aliases} | {'message', 'msg'})
+VALUES = ['', 0, None, 'x', 'warn', '404', 201, 35.5, 'java.lang.IllegalStateException: boom', {'nested': 'v'}]
+
+
+def legacy_parse_log_message(message: str) -> dict:
+    """기존 if-chain 방식의 필드 정규화 (골든 비교용 복사본)"""
+    parsed = {}
+
+    # JSON 로그 파싱 시도
+    try:
+        if message.strip().startswith('{'):
+            json_data = lambda_function.json_loads(message)
+
+            # === 모든 JSON 필드를 최상위로 평탄화 ===
+            parsed = lambda_function.flatten_json(json_data)
+
+            # === 필드 정규화 (일관된 필드명으로 변환) ===
+            # 로그 레벨 정규화
+            level = parsed.get('level') or parsed.get('log_level') or parsed.get('severity')
+            if level:
+                parsed['log_level'] = str(level).upper()
+
+            # 로거 정규화
+            logger_name = parsed.get('logger') or parsed.get('logger_name') or parsed.get('caller')
+            if logger_name:
+                parsed['logger'] = logger_name
+
+            # 스레드 정규화
+            thread = parsed.get('thread') or parsed.get('thread_name')
+            if thread:
+                parsed['thread'] = thread
+
+            # 메시지 정규화 (원본 JSON의 message 필드)
+            if 'message' in parsed and isinstance(parsed['message'], str):
+                parsed['parsed_message'] = parsed['message']
+                del parsed['message']  # raw_message에 원본이 있으므로 중복 제거
+            elif 'msg' in parsed:
+                parsed['parsed_message'] = parsed['msg']
+
+            # 스택 트레이스 정규화
+            stack_trace = parsed.get('stack_trace') or parsed.get('stacktrace') or parsed.get('exception')
+            if stack_trace:
+                parsed['stack_trace'] = stack_trace
+                exception_class = lambda_function.extract_exception_class(str(stack_trace))
+                if exception_class:
+                    parsed['exception_class'] = exception_class
+
+            # HTTP 관련 필드 정규화
+            http_method = parsed.get('http_method') or parsed.get('method') or parsed.get('httpMethod')
+            if http_method:
+                parsed['http_method'] = http_method
+
+            http_path = parsed.get('http_path') or parsed.get('path') or parsed.get('uri') or parsed.get('url')
+            if http_path:
+                parsed['http_path'] = http_path
+
+            status_code = parsed.get('status_code') or parsed.get('statusCode') or parsed.get('status') or parsed.get('http_status')
+            if status_code:
+                parsed['status_code'] = int(status_code) if str(status_code).isdigit() else status_code
+
+            duration = parsed.get('duration') or parsed.get('duration_ms') or parsed.get('response_time') or parsed.get('elapsed')
+            if duration:
+                parsed['duration_ms'] = duration
+
+            client_ip = parsed.get('client_ip') or parsed.get('clientIp') or parsed.get('remote_addr') or parsed.get('ip')
+            if client_ip:
+                parsed['client_ip'] = client_ip
+
+            # 분산 추적 필드 정규화
+            trace_id = parsed.get('trace_id') or parsed.get('traceId') or parsed.get('x-amzn-trace-id')
+            if trace_id:
+                parsed['trace_id'] = trace_id
+
+            span_id = parsed.get('span_id') or parsed.get('spanId')
+            if span_id:
+                parsed['span_id'] = span_id
+
+            request_id = parsed.get('request_id') or parsed.get('requestId') or parsed.get('correlationId')
+            if request_id:
+                parsed['request_id'] = request_id
+
+            # 비즈니스 컨텍스트 정규화
+            user_id = parsed.get('user_id') or parsed.get('userId')
+            if user_id:
+                parsed['user_id'] = user_id
+
+            action = parsed.get('action') or parsed.get('operation')
+            if action:
+                parsed['action'] = action
+
+            app_name = parsed.get('APP_NAME') or parsed.get('application') or parsed.get('service') or parsed.get('SERVICE_NAME')
+            if app_name:
+                parsed['app_name'] = app_name
+
+            env = parsed.get('APP_ENV') or parsed.get('environment') or parsed.get('env') or parsed.get('ENVIRONMENT')
+            if env:
+                parsed['environment'] = env
+
+    except json.JSONDecodeError:
+        pass
+
+    return parsed
+
+
+def legacy_flatten_json(obj: dict, parent_key: str = '', separator: str = '_') -> dict:
+    """기존 재귀 방식의 JSON 평탄화 (골든 비교용 복사본)"""
+    items = {}
+
+    for key, value in obj.items():
+        new_key = f"{parent_key}{separator}{key}" if parent_key else key
+
+        if isinstance(value, dict):
+            # 중첩된 객체는 재귀적으로 평탄화
+            items.update(legacy_flatten_json(value, new_key, separator))
+        elif isinstance(value, list):
+            # 리스트는 그대로 유지 (OpenSearch에서 배열 지원)
+            items[new_key] = value
+        else:
+            # 기본 값은 그대로 저장
+            items[new_key] = value
+
+    return items
+
+
+def random_nested(rng: random.Random, depth: int):
+    """무작위 중첩 객체를 생성합니다."""
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(VALUES)
+    return {f'k{i}': random_nested(rng, depth - 1) for i in range(rng.randint(0, 4))}
+
+
+def random_document(rng: random.Random) -> str:
+    """별칭 키 조합이 무작위인 JSON 로그 라인을 생성합니다."""
+    keys = rng.sample(ALIAS_KEYS, rng.randint(0, 12))
+    document = {key: rng.choice(VALUES) for key in keys}
+    document.update({f'extra_{i}': i for i in range(rng.randint(0, 5))})
+    return json.dumps(document)
+
+
+def main():
+    rng = random.Random(12)
+    corpus = SAMPLE_LINES + [random_document(rng) for _ in range(20000)]
+
+    mismatches = [line for line in corpus if legacy_parse_log_message(line) != lambda_function.parse_log_message(line)]
+    print(f"golden check: {len(corpus) - len(mismatches)}/{len(corpus)} identical")
+    for line in mismatches[:5]:
+        print(f"  mismatch: {line}")
+
+    nested = [random_nested(rng, 6) for _ in range(5000)]
+    nested = [document for document in nested if isinstance(document, dict)]
+    mismatches = [
+        document for document in nested
+        if legacy_flatten_json(document) != lambda_function.flatten_json(document, max_depth=64, max_fields=10 ** 6)
+    ]
+    print(f"flatten golden check: {len(nested) - len(mismatches)}/{len(nested)} identical")
+
+    number = 20000
+    for label, fn in (('legacy', legacy_parse_log_message), ('table', lambda_function.parse_log_message)):
+        elapsed = min(timeit.repeat(lambda: [fn(line) for line in SAMPLE_LINES], number=number, repeat=3))
+        print(f"{label:>8}: {elapsed / (number * len(SAMPLE_LINES)) * 1e6:6.2f} us/doc")
+
+    # 두 구현을 번갈아 측정하여 실행 환경의 속도 변동이 한쪽에만 반영되지 않도록 함
+    documents = [json.loads(line) for line in SAMPLE_LINES] + nested[:50]
+    flatten_fns = (('legacy', legacy_flatten_json), ('flatten', lambda_function.flatten_json))
+    best = dict.fromkeys(label for label, _ in flatten_fns)
+    for _ in range(30):
+        for label, fn in flatten_fns:
+            elapsed = timeit.timeit(lambda: [fn(document) for document in documents], number=200)
+            best[label] = elapsed if best[label] is None else min(best[label], elapsed)
+    for label, elapsed in best.items():
+        print(f"{label:>8}: {elapsed / (200 * len(documents)) * 1e6:6.2f} us/flatten")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+JSON 백엔드 처리량 벤치마크
+
+Spring Boot(logstash-logback-encoder) 형식의 JSON 로그 라인으로
+표준 라이브러리 json과 orjson 백엔드의 디코딩/문서 변환/직렬화 처리량을 비교하고,
+두 백엔드의 결과가 동일한지 확인합니다.
+
+실행:
+    python tools/log-router/benchmarks/bench_json.py
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'lambda', 'log-router'))
+
+import lambda_function  # noqa: E402
+
+STACK_TRACE = (
+    "org.springframework.dao.DataIntegrityViolationException: could not execute statement\n"
+    + "".join(f"\tat com.connectly.order.service.OrderService.method{i}(OrderService.java:{100 + i})\n" for i in range(40))
+    + "Caused by: java.sql.SQLIntegrityConstraintViolationException: Duplicate entry '1' for key 'PRIMARY'\n"
+)
+
+SAMPLE_LINES = [
+    json.dumps({
+        "@timestamp": "2025-01-15T10:23:45.123+09:00",
+        "@version": "1",
+        "message": "Completed 200 OK in 35ms",
+        "logger_name": "org.springframework.web.servlet.DispatcherServlet",
+        "thread_name": "http-nio-8080-exec-7",
+        "level": "INFO",
+        "level_value": 20000,
+        "traceId": "65a4f1c2b3d4e5f60718293a4b5c6d7e",
+        "spanId": "0718293a4b5c6d7e",
+        "APP_NAME": "gateway",
+        "APP_ENV": "prod",
+    }),
+    json.dumps({
+        "@timestamp": "2025-01-15T10:23:45.456+09:00",
+        "@version": "1",
+        "message": "주문 생성 요청 처리 완료",
+        "logger_name": "com.connectly.order.api.OrderController",
+        "thread_name": "http-nio-8080-exec-3",
+        "level": "INFO",
+        "level_value": 20000,
+        "mdc": {"userId": "u-10293", "requestId": "req-8f7e6d5c", "clientIp": "10.0.12.34"},
+        "http": {"method": "POST", "path": "/api/v1/orders", "status": 201, "duration_ms": 42},
+        "traceId": "65a4f1c2b3d4e5f60718293a4b5c6d7f",
+    }),
+    json.dumps({
+        "@timestamp": "2025-01-15T10:23:46.789+09:00",
+        "@version": "1",
+        "message": "Unhandled exception while processing request",
+        "logger_name": "com.connectly.common.web.GlobalExceptionHandler",
+        "thread_name": "http-nio-8080-exec-9",
+        "level": "ERROR",
+        "level_value": 40000,
+        "stack_trace": STACK_TRACE,
+        "traceId": "65a4f1c2b3d4e5f60718293a4b5c6d80",
+        "spanId": "293a4b5c6d7e8f90",
+    }),
+]
+
+
+def run(backend: str, iterations: int) -> tuple:
+    """백엔드별 (lines/s, 직렬화 결과 목록)을 반환합니다."""
+    applied = lambda_function.use_json_backend(backend)
+    record_context = lambda_function.build_record_context({
+        'logGroup': '/aws/ecs/gateway-prod/application',
+        'logStream': 'ecs/gateway/abc',
+        'owner': '123456789012',
+    })
+    events = [{'id': str(i), 'timestamp': 1736904225123, 'message': line} for i, line in enumerate(SAMPLE_LINES)]
+
+    outputs = [lambda_function.json_dumps(lambda_function.transform_log_event(e, record_context)) for e in events]
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for log_event in events:
+            lambda_function.json_dumps(lambda_function.transform_log_event(log_event, record_context))
+    elapsed = time.perf_counter() - start
+
+    return applied, iterations * len(events) / elapsed, outputs
+
+
+def main():
+    iterations = 5000
+
+    _, stdlib_rate, stdlib_outputs = run('json', iterations)
+    print(f"{'json':>8}: {stdlib_rate:10,.0f} lines/s")
+
+    applied, orjson_rate, orjson_outputs = run('orjson', iterations)
+    if applied != 'orjson':
+        print("orjson is not installed, skipping comparison")
+        return
+
+    print(f"{'orjson':>8}: {orjson_rate:10,.0f} lines/s ({orjson_rate / stdlib_rate:.2f}x)")
+    print(f"byte-identical output: {stdlib_outputs == orjson_outputs}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+SigV4 서명 오버헤드 마이크로벤치마크
+
+- 요청당 서명 비용: 요청마다 botocore session을 조회하던 기존 방식,
+  botocore 서명기 캐시, 표준 라이브러리 서명기(일 단위 signing key 캐시) 비교
+- Cold start 비용: botocore 서명 모듈 import + credentials 조회 시간과
+  lambda_function import 시간을 별도 프로세스에서 측정
+
+botocore 관련 항목은 botocore가 설치된 경우에만 측정합니다.
+
+실행:
+    python tools/log-router/benchmarks/bench_sigv4.py
+"""
+
+import os
+import subprocess
+import sys
+import timeit
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'AKIDEXAMPLE')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY')
+os.environ.setdefault('AWS_SESSION_TOKEN', 'session-token')
+
+ROUTER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'lambda', 'log-router')
+sys.path.insert(0, ROUTER_DIR)
+
+import lambda_function  # noqa: E402
+
+URL = 'https://search-logs.ap-northeast-2.es.amazonaws.com/_bulk'
+BODY = b'{"index":{"_index":"logs-gateway-2025-01-01"}}\n{"message":"hello"}\n' * 100
+HEADERS = {'Content-Type': 'application/x-ndjson'}
+
+BOTOCORE_INIT = (
+    "from botocore.auth import SigV4Auth; "
+    "import botocore.session; "
+    "SigV4Auth(botocore.session.get_session().get_credentials().get_frozen_credentials(), 'es', 'ap-northeast-2')"
+)
+STDLIB_INIT = (
+    "import sys; sys.path.insert(0, {router_dir!r}); "
+    "import lambda_function; lambda_function._get_sigv4_credentials()"
+)
+
+
+def sign_botocore_uncached():
+    """기존 방식: 요청마다 session/credentials/SigV4Auth 생성"""
+    from botocore.auth import SigV4Auth
+    from botocore.awsrequest import AWSRequest
+    import botocore.session
+
+    session = botocore.session.get_session()
+    credentials = session.get_credentials()
+    request = AWSRequest(method='POST', url=URL, data=BODY, headers=HEADERS)
+    SigV4Auth(credentials, 'es', 'ap-northeast-2').add_auth(request)
+    return dict(request.headers)
+
+
+_botocore_signer = None
+
+
+def sign_botocore_cached():
+    """botocore 서명기를 실행 환경 단위로 캐시"""
+    global _botocore_signer
+    from botocore.auth import SigV4Auth
+    from botocore.awsrequest import AWSRequest
+
+    if _botocore_signer is None:
+        import botocore.session
+        credentials = botocore.session.get_session().get_credentials().get_frozen_credentials()
+        _botocore_signer = SigV4Auth(credentials, 'es', 'ap-northeast-2')
+
+    request = AWSRequest(method='POST', url=URL, data=BODY, headers=HEADERS)
+    _botocore_signer.add_auth(request)
+    return dict(request.headers)
+
+
+def sign_stdlib():
+    """표준 라이브러리 서명기 (signing key 일 단위 캐시)"""
+    return lambda_function.sign_request('POST', URL, BODY, HEADERS)
+
+
+def measure_init(code: str, runs: int = 5) -> float:
+    """새 인터프리터에서 code 실행에 걸린 최소 시간(ms)을 측정합니다."""
+    timer = (
+        "import time; _t = time.perf_counter(); "
+        + code
+        + "; print((time.perf_counter() - _t) * 1000)"
+    )
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', timer], capture_output=True, text=True, check=True)
+        samples.append(float(output.stdout.strip()))
+    return min(samples)
+
+
+def main():
+    try:
+        import botocore  # noqa: F401
+        has_botocore = True
+    except ImportError:
+        has_botocore = False
+
+    print("Per-request signing cost")
+    candidates = [('stdlib', sign_stdlib)]
+    if has_botocore:
+        candidates = [('botocore uncached', sign_botocore_uncached),
+                      ('botocore cached', sign_botocore_cached)] + candidates
+
+    number = 500
+    for name, func in candidates:
+        func()  # import 및 초기화 비용 제외
+        elapsed = min(timeit.repeat(func, number=number, repeat=5))
+        print(f"  {name:>18}: {elapsed / number * 1e6:8.1f} us/request")
+
+    print("Cold start (import + credentials init)")
+    if has_botocore:
+        print(f"  {'botocore':>18}: {measure_init(BOTOCORE_INIT):8.1f} ms")
+    print(f"  {'lambda_function':>18}: {measure_init(STDLIB_INIT.format(router_dir=ROUTER_DIR)):8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
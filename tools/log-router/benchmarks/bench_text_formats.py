@@ -0,0 +1,70 @@
+"""
+텍스트 로그 포맷 파서 처리량 벤치마크
+
+TEXT_LOG_FORMATS의 포맷별로 샘플 라인의 파싱 처리량(lines/s)을 측정합니다.
+로그 그룹 캐시로 포맷이 결정된 상태(첫 패턴에서 매칭)와
+어느 포맷에도 매칭되지 않는 라인(모든 패턴 시도)의 비용을 함께 출력합니다.
+
+실행:
+    python tools/log-router/benchmarks/bench_text_formats.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'lambda', 'log-router'))
+
+import lambda_function  # noqa: E402
+
+SAMPLE_LINES = {
+    'spring_boot': (
+        "2025-01-15 10:23:45.123  INFO 1 --- [nio-8080-exec-7] c.c.order.api.OrderController"
+        "            : 주문 생성 요청 처리 완료 orderId=10293"
+    ),
+    'logback': "10:23:45.123 [http-nio-8080-exec-3] WARN  c.c.order.service.OrderService - 재고 조회 지연 elapsed=1203ms",
+    'nginx': (
+        '10.0.12.34 - - [15/Jan/2025:10:23:45 +0900] "GET /api/v1/orders?page=1 HTTP/1.1" 200 5123 '
+        '"https://connectly.example.com/" "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)" 0.035'
+    ),
+    'alb': (
+        'https 2025-01-15T01:23:45.123456Z app/gateway-prod/50dc6c495c0c9188 10.0.12.34:52344 10.0.1.2:8080 '
+        '0.000 0.035 0.000 200 200 34 366 "GET https://api.example.com:443/api/v1/orders HTTP/1.1" '
+        '"curl/8.0" ECDHE-RSA-AES128-GCM-SHA256 TLSv1.2'
+    ),
+    'lambda_report': (
+        "REPORT RequestId: 3f2a6c1e-8d4b-4f3a-9c2e-1b7a5d9e0f11\tDuration: 12.34 ms\tBilled Duration: 13 ms\t"
+        "Memory Size: 256 MB\tMax Memory Used: 70 MB\tInit Duration: 201.52 ms\t"
+    ),
+}
+
+UNMATCHED_LINE = "START RequestId: 3f2a6c1e-8d4b-4f3a-9c2e-1b7a5d9e0f11 Version: $LATEST"
+
+
+def rate(line: str, text_formats: list, number: int) -> float:
+    elapsed = min(timeit.repeat(
+        lambda: lambda_function.parse_text_message(line, text_formats), number=number, repeat=3,
+    ))
+    return number / elapsed
+
+
+def main():
+    number = 50000
+
+    for format_name, line in SAMPLE_LINES.items():
+        text_formats = list(lambda_function.TEXT_LOG_FORMATS)
+        parsed = lambda_function.parse_text_message(line, text_formats)
+        assert parsed.get('log_format') == format_name, (format_name, parsed)
+        print(f"{format_name:>14}: {rate(line, text_formats, number):12,.0f} lines/s  fields={len(parsed)}")
+
+    text_formats = list(lambda_function.TEXT_LOG_FORMATS)
+    print(f"{'(unmatched)':>14}: {rate(UNMATCHED_LINE, text_formats, number):12,.0f} lines/s")
+
+    baseline = min(timeit.repeat(
+        lambda: lambda_function.extract_log_level(SAMPLE_LINES['spring_boot']), number=number, repeat=3,
+    ))
+    print(f"{'(level only)':>14}: {number / baseline:12,.0f} lines/s")
+
+
+if __name__ == '__main__':
+    main()
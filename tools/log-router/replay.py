@@ -0,0 +1,414 @@
+"""
+Log Router 재처리 도구 (스필 파일 / DLQ → OpenSearch)
+
+OpenSearch 장애 이후 백필을 위한 CLI입니다. log-router의 변환/Bulk 코드를 그대로 사용합니다.
+
+- spill: 서킷 브레이커가 저장한 gzip NDJSON 스필 파일(로컬 경로 또는 s3://bucket/prefix)을
+  다시 디코딩하지 않고 그대로 Bulk 전송
+- dlq: log-router-dlq 메시지(Kinesis 배치 메타데이터)의 시퀀스 범위를 Kinesis에서 다시 읽어
+  log-router와 같은 방식으로 변환 후 전송 (스트림 보존 기간 내의 레코드만 가능)
+
+로그 문서는 event_id 기반 _id의 create 작업이라 다시 보내도 중복 저장되지 않지만, 스필 파일에는
+롤업 update(스크립트로 건수 누적)와 _id 없는 수집 한도 요약 문서도 들어 있어 같은 파일을 다시
+실행하면 이들이 중복 반영됩니다. 따라서 spill 모드는 전송에 실패한 항목만 --retry-dir에 새 스필
+파일로 저장하며, 재실행은 원본이 아니라 이 파일을 대상으로 합니다 (dlq 모드는 create만 전송).
+Bulk 청크 크기/동시성은 AdaptiveBulkController가 조정합니다.
+입력 파일 읽기와 Kinesis 조회는 --workers개 스레드로 병렬 처리합니다.
+
+실행:
+    python tools/log-router/replay.py spill /tmp/spill s3://bucket/log-router-spill [--retry-dir DIR] [--dry-run]
+    python tools/log-router/replay.py dlq dlq-messages.json [--dry-run]
+
+    DLQ 메시지 파일은 `aws sqs receive-message` 출력({"Messages": [...]}),
+    메시지 본문 JSON(배열) 또는 JSON Lines 형식을 지원합니다.
+
+환경 변수:
+    OPENSEARCH_ENDPOINT, AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_SESSION_TOKEN
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'lambda', 'log-router'))
+
+# 환경 변수(엔드포인트, 동시성 등)를 설정한 뒤 main()에서 import
+lambda_function = None
+
+S3_NAMESPACE = '{http://s3.amazonaws.com/doc/2006-03-01/}'
+KINESIS_MAX_RETRIES = 5
+
+# 버킷별 S3 클라이언트 (파일마다 새 커넥션 풀을 만들지 않고 keep-alive 재사용)
+_s3_clients = {}
+_s3_clients_lock = threading.Lock()
+
+
+def iter_parallel(fn, items, workers: int):
+    """
+    items에 fn을 workers개 스레드로 적용하고 입력 순서대로 결과를 반환합니다.
+    메모리 사용을 제한하기 위해 동시에 진행 중인 작업은 workers * 2개까지만 유지합니다.
+
+    Yields:
+        (item, result, error) - 실패한 경우 result는 None
+    """
+    def run(item):
+        try:
+            return item, fn(item), None
+        except Exception as e:
+            return item, None, e
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='replay') as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(run, item))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class S3Client:
+    """스필 파일 조회용 최소 S3 클라이언트입니다 (ListObjectsV2, GetObject)."""
+
+    def __init__(self, bucket: str):
+        self.bucket = bucket
+        self.host = f"{bucket}.s3.{lambda_function.OPENSEARCH_REGION}.amazonaws.com"
+        self._pool = lambda_function.HTTPSConnectionPool(self.host, max_size=8)
+
+    def _get(self, key: str = '', params: dict = None) -> bytes:
+        query = '&'.join(
+            f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}" for name, value in sorted((params or {}).items())
+        )
+        suffix = f"?{query}" if query else ''
+        headers = lambda_function.sign_request('GET', f"https://{self.host}/{key}{suffix}", service='s3')
+
+        status, body = self._pool.request('GET', f"/{quote(key, safe='/~')}{suffix}", headers=headers, timeout=60)
+        if status >= 300:
+            raise RuntimeError(f"S3 GET {key or '/'} failed: HTTP {status} {body[:300]}")
+        return body
+
+    def list_keys(self, prefix: str) -> list:
+        keys = []
+        params = {'list-type': '2', 'prefix': prefix}
+        while True:
+            root = ElementTree.fromstring(self._get(params=params))
+            keys.extend(
+                element.text for element in root.iter(f'{S3_NAMESPACE}Key')
+                if element.text.endswith('.ndjson.gz')
+            )
+            token = root.findtext(f'{S3_NAMESPACE}NextContinuationToken')
+            if not token:
+                return keys
+            params['continuation-token'] = token
+
+    def get_object(self, key: str) -> bytes:
+        return self._get(key)
+
+
+class KinesisClient:
+    """DLQ 배치 재조회용 최소 Kinesis 클라이언트입니다 (GetShardIterator, GetRecords)."""
+
+    def __init__(self, region: str):
+        self.region = region
+        self.host = f"kinesis.{region}.amazonaws.com"
+        self._pool = lambda_function.HTTPSConnectionPool(self.host, max_size=8)
+
+    def call(self, target: str, payload: dict) -> dict:
+        body = json.dumps(payload).encode('utf-8')
+
+        for attempt in range(KINESIS_MAX_RETRIES):
+            headers = lambda_function.sign_request(
+                'POST', f"https://{self.host}/", body,
+                {'Content-Type': 'application/x-amz-json-1.1', 'X-Amz-Target': f'Kinesis_20131202.{target}'},
+                service='kinesis', region=self.region,
+            )
+            status, response_body = self._pool.request('POST', '/', body=body, headers=headers, timeout=30)
+
+            # 샤드당 GetRecords 한도(초당 5회) 초과 시 대기 후 재시도
+            if status == 400 and b'ProvisionedThroughputExceededException' in response_body:
+                time.sleep(2 ** attempt * 0.5)
+                continue
+            if status >= 300:
+                raise RuntimeError(f"Kinesis {target} failed: HTTP {status} {response_body[:300]}")
+            return json.loads(response_body)
+
+        raise RuntimeError(f"Kinesis {target} throttled {KINESIS_MAX_RETRIES} times")
+
+    def fetch_batch(self, batch_info: dict) -> list:
+        """
+        DLQ 메시지의 KinesisBatchInfo 시퀀스 범위 레코드를 Lambda 이벤트 레코드 형식으로 반환합니다.
+        """
+        stream_arn = batch_info['streamArn']
+        shard_id = batch_info['shardId']
+        end_sequence = int(batch_info['endSequenceNumber'])
+
+        shard_iterator = self.call('GetShardIterator', {
+            'StreamARN': stream_arn,
+            'ShardId': shard_id,
+            'ShardIteratorType': 'AT_SEQUENCE_NUMBER',
+            'StartingSequenceNumber': batch_info['startSequenceNumber'],
+        })['ShardIterator']
+
+        records = []
+        while shard_iterator:
+            response = self.call('GetRecords', {'ShardIterator': shard_iterator, 'Limit': 1000, 'StreamARN': stream_arn})
+            for record in response.get('Records', []):
+                sequence_number = record['SequenceNumber']
+                if int(sequence_number) > end_sequence:
+                    return records
+                records.append({
+                    'eventID': f"{shard_id}:{sequence_number}",
+                    'kinesis': {'data': record['Data'], 'sequenceNumber': sequence_number},
+                })
+                if int(sequence_number) == end_sequence:
+                    return records
+
+            if not response.get('Records') and response.get('MillisBehindLatest', 0) == 0:
+                return records
+            shard_iterator = response.get('NextShardIterator')
+
+        return records
+
+
+def get_s3_client(bucket: str) -> S3Client:
+    """버킷별 S3 클라이언트를 반환합니다 (읽기 스레드 간 공유)."""
+    with _s3_clients_lock:
+        client = _s3_clients.get(bucket)
+        if client is None:
+            client = _s3_clients[bucket] = S3Client(bucket)
+        return client
+
+
+def load_dlq_messages(path: str) -> list:
+    """DLQ 메시지 파일에서 KinesisBatchInfo 목록을 읽습니다."""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+
+    try:
+        data = json.loads(text)
+        messages = data.get('Messages', [data]) if isinstance(data, dict) else data
+    except json.JSONDecodeError:
+        messages = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    batches = []
+    for message in messages:
+        # SQS 메시지 래퍼인 경우 본문을 다시 파싱
+        if 'Body' in message:
+            message = json.loads(message['Body'])
+        batch_info = message.get('KinesisBatchInfo')
+        if batch_info:
+            batches.append(batch_info)
+    return batches
+
+
+def list_spill_files(targets: list) -> list:
+    """로컬 경로/디렉터리와 s3://bucket/prefix를 스필 파일 목록(경로 또는 s3 URL)으로 펼칩니다."""
+    files = []
+    for target in targets:
+        if target.startswith('s3://'):
+            parsed = urlsplit(target)
+            client = get_s3_client(parsed.netloc)
+            files.extend(f"s3://{parsed.netloc}/{key}" for key in client.list_keys(parsed.path.lstrip('/')))
+        elif os.path.isdir(target):
+            for root, _, names in os.walk(target):
+                files.extend(os.path.join(root, name) for name in names if name.endswith('.ndjson.gz'))
+        else:
+            files.append(target)
+    return sorted(files)
+
+
+def read_spill_file(location: str) -> bytes:
+    """스필 파일을 읽어 압축을 해제한 Bulk NDJSON을 반환합니다."""
+    if location.startswith('s3://'):
+        parsed = urlsplit(location)
+        data = get_s3_client(parsed.netloc).get_object(parsed.path.lstrip('/'))
+    else:
+        with open(location, 'rb') as f:
+            data = f.read()
+    return gzip.decompress(data)
+
+
+def iter_spill_entries(body: bytes):
+    """
+    스필 파일 본문을 Bulk 항목 단위로 나눕니다.
+
+    Yields:
+        (action_line, entry) - entry는 action line + 문서 줄
+    """
+    lines = body.split(b'\n')
+    for i in range(0, len(lines) - 1, 2):
+        action_line, document_line = lines[i], lines[i + 1]
+        if action_line:
+            yield action_line, action_line + b'\n' + document_line + b'\n'
+
+
+def replay_spill(targets: list, writer, report: dict, workers: int):
+    """스필 파일의 Bulk 항목을 그대로 다시 전송합니다 (source_id = (파일 위치, 항목 번호))."""
+    files = list_spill_files(targets)
+    report['inputs'] = len(files)
+
+    for location, body, error in iter_parallel(read_spill_file, files, workers):
+        if error is not None:
+            print(f"failed to read {location}: {error}", file=sys.stderr)
+            report['failed_inputs'].append(location)
+            continue
+
+        report['spill_files'].append(location)
+        for entry_number, (action_line, entry) in enumerate(iter_spill_entries(body)):
+            report['documents'] += 1
+            report['bytes'] += len(entry)
+            if writer is not None:
+                index_name = next(iter(lambda_function.json_loads(action_line).values()))['_index']
+                writer.add_entry(index_name, entry, (location, entry_number))
+
+
+def write_retry_files(files: list, failed_sources: set, retry_dir: str) -> list:
+    """
+    읽기에 성공한 스필 파일(files) 중 전송에 실패한 항목만 원본 파일별로 모아 retry_dir에 새 스필 파일로 저장합니다.
+
+    성공한 롤업 update나 요약 문서가 재실행 시 다시 반영되지 않도록, 재실행은 이 파일만 대상으로 합니다.
+    retry_dir의 파일을 다시 처리한 경우에는 남은 실패 항목으로 덮어쓰고, 모두 성공했으면 삭제합니다.
+
+    Returns:
+        저장한 재처리 파일 경로 목록
+    """
+    failed_entries = {}
+    for location, entry_number in failed_sources:
+        failed_entries.setdefault(location, set()).add(entry_number)
+
+    for location in files:
+        if location not in failed_entries and os.path.dirname(os.path.abspath(location)) == os.path.abspath(retry_dir):
+            os.remove(location)
+
+    retry_files = []
+    if failed_entries:
+        os.makedirs(retry_dir, exist_ok=True)
+    for location, entry_numbers in sorted(failed_entries.items()):
+        body = b''.join(
+            entry for entry_number, (_, entry) in enumerate(iter_spill_entries(read_spill_file(location)))
+            if entry_number in entry_numbers
+        )
+        # 스필 파일명은 시각 + 난수라 원본 파일 간에 겹치지 않음
+        path = os.path.join(retry_dir, os.path.basename(urlsplit(location).path))
+        with open(path, 'wb') as f:
+            f.write(gzip.compress(body, compresslevel=6))
+        retry_files.append(path)
+    return retry_files
+
+
+def replay_dlq(paths: list, writer, report: dict, workers: int):
+    """DLQ 배치의 Kinesis 레코드를 다시 읽어 log-router와 같은 방식으로 변환 후 전송합니다."""
+    batches = [batch_info for path in paths for batch_info in load_dlq_messages(path)]
+    report['inputs'] = len(batches)
+
+    client = KinesisClient(lambda_function.OPENSEARCH_REGION)
+    sampling_stats = {}
+
+    for batch_info, records, error in iter_parallel(client.fetch_batch, batches, workers):
+        batch_id = f"{batch_info['shardId']}:{batch_info['startSequenceNumber']}"
+        if error is not None:
+            print(f"failed to fetch {batch_id}: {error}", file=sys.stderr)
+            report['failed_inputs'].append(batch_id)
+            continue
+
+        failed_records = []
+        for _, index_name, doc in lambda_function.iter_log_documents(records, failed_records):
+            # 샘플링은 결정적이므로 실시간 경로와 같은 문서만 남김 (수집 한도는 적용하지 않음)
+            if lambda_function._sampling_thresholds and not lambda_function.sample_document(doc, sampling_stats):
+                continue
+
+            report['documents'] += 1
+            if writer is not None:
+                writer.add(index_name, doc, batch_id)
+            else:
+                report['bytes'] += len(lambda_function.json_dumps(doc)) + 1
+
+        if failed_records:
+            report['failed_inputs'].append(batch_id)
+
+
+def print_report(report: dict, writer, elapsed: float, dry_run: bool):
+    """처리량 보고서를 출력합니다."""
+    documents = report['documents']
+    print(f"{'mode':>18}: {report['mode']}{' (dry-run)' if dry_run else ''}")
+    print(f"{'inputs':>18}: {report['inputs']} ({len(report['failed_inputs'])} failed)")
+    print(f"{'documents':>18}: {documents:,}")
+    print(f"{'elapsed':>18}: {elapsed:.1f}s")
+    print(f"{'throughput':>18}: {documents / elapsed if elapsed else 0:,.0f} docs/s")
+
+    if writer is not None:
+        metrics = writer.controller.export_metrics() if writer.controller is not None else {}
+        print(f"{'indexed':>18}: {writer.success_count:,}")
+        print(f"{'errors':>18}: {writer.error_count:,}")
+        print(f"{'spilled':>18}: {writer.spilled_count:,}")
+        for name, value in metrics.items():
+            print(f"{name:>18}: {value:,.0f}")
+        if report['mode'] == 'spill':
+            failed_sources = report['retry_files']
+        else:
+            failed_sources = sorted(writer.failed_sources)
+    else:
+        print(f"{'bulk bytes':>18}: {report['bytes'] / 1024 / 1024:,.1f} MB")
+        failed_sources = []
+
+    # 다시 실행해야 하는 입력 (spill 모드는 실패한 항목만 모은 --retry-dir의 파일)
+    for source in sorted(set(failed_sources) | set(report['failed_inputs'])):
+        print(f"{'retry needed':>18}: {source}")
+
+
+def main(argv: list = None) -> int:
+    global lambda_function
+
+    parser = argparse.ArgumentParser(description='Replay log-router spill files or DLQ batches into OpenSearch')
+    parser.add_argument('mode', choices=['spill', 'dlq'], help='입력 종류')
+    parser.add_argument('inputs', nargs='+', help='스필 파일/디렉터리/s3://bucket/prefix 또는 DLQ 메시지 파일')
+    parser.add_argument('--endpoint', help='OpenSearch 엔드포인트 (기본값: OPENSEARCH_ENDPOINT)')
+    parser.add_argument('--region', help='AWS 리전 (기본값: AWS_REGION)')
+    parser.add_argument('--workers', type=int, default=4, help='입력 읽기/Kinesis 조회 병렬 수')
+    parser.add_argument('--concurrency', type=int, default=8, help='최대 Bulk 동시 전송 수')
+    parser.add_argument('--retry-dir', default='replay-retry', help='spill 모드에서 실패한 항목을 저장할 디렉터리')
+    parser.add_argument('--dry-run', action='store_true', help='읽기/변환만 하고 전송하지 않음')
+    args = parser.parse_args(argv)
+
+    if args.endpoint:
+        os.environ['OPENSEARCH_ENDPOINT'] = args.endpoint
+    if args.region:
+        os.environ['AWS_REGION'] = args.region
+    os.environ['BULK_MAX_CONCURRENCY'] = str(args.concurrency)
+    os.environ['SPILL_TARGET'] = ''  # 재처리 중 실패한 청크를 다시 스필하지 않음
+
+    import lambda_function as module
+    lambda_function = module
+
+    if not args.dry_run and not lambda_function.OPENSEARCH_ENDPOINT:
+        parser.error('OPENSEARCH_ENDPOINT or --endpoint is required (or use --dry-run)')
+
+    writer = None if args.dry_run else lambda_function.BulkWriter()
+    report = {'mode': args.mode, 'inputs': 0, 'failed_inputs': [], 'spill_files': [], 'retry_files': [], 'documents': 0, 'bytes': 0}
+
+    started_at = time.monotonic()
+    if args.mode == 'spill':
+        replay_spill(args.inputs, writer, report, args.workers)
+    else:
+        replay_dlq(args.inputs, writer, report, args.workers)
+    if writer is not None:
+        writer.close()
+        if args.mode == 'spill':
+            report['retry_files'] = write_retry_files(report['spill_files'], writer.failed_sources, args.retry_dir)
+    elapsed = time.monotonic() - started_at
+
+    print_report(report, writer, elapsed, args.dry_run)
+    failed = report['failed_inputs'] or (writer is not None and writer.failed_sources)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())